@@ -3,9 +3,10 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
-from rest_framework_simplyjwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework import serializers
-from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
 from .models import User
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -21,7 +22,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         self.fields['email'] = serializers.EmailField()
         self.fields['password'] = serializers.CharField()
         # Retirer le champ username par défaut
-        del self.fields['username']
+        self.fields.pop('username', None)
     
     def validate(self, attrs):
         """Validation personnalisée pour l'authentification"""
@@ -29,36 +30,43 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         password = attrs.get('password')
         
         if email and password:
-            # Chercher l'utilisateur par email
+            # Chercher l'utilisateur par email, une seule requête avec les colonnes utiles
             try:
-                user = User.objects.get(email=email)
-                username = user.username
+                user = User.objects.only(
+                    'user_id', 'username', 'email', 'first_name', 'last_name',
+                    'role', 'password', 'is_active'
+                ).get(email=email)
             except User.DoesNotExist:
                 raise serializers.ValidationError('Aucun utilisateur trouvé avec cet email.')
             
-            # Authentifier avec le username trouvé
-            user = authenticate(username=username, password=password)
-            
-            if user:
-                if not user.is_active:
-                    raise serializers.ValidationError('Compte utilisateur désactivé.')
-                
-                # Utiliser le processus JWT standard
-                attrs['username'] = username
-                data = super().validate(attrs)
-                
-                # Ajouter des infos utilisateur au token
-                data['user'] = {
-                    'user_id': str(user.user_id),
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'role': user.role,
-                }
-                
-                return data
-            else:
+            # Vérifier le mot de passe sur l'utilisateur déjà chargé
+            if not user.check_password(password):
                 raise serializers.ValidationError('Email ou mot de passe incorrect.')
+            
+            if not user.is_active:
+                raise serializers.ValidationError('Compte utilisateur désactivé.')
+            
+            # Générer les tokens JWT comme TokenObtainPairSerializer, sans réauthentifier
+            self.user = user
+            refresh = self.get_token(user)
+            data = {
+                'refresh': str(refresh),
+                'access': str(refresh.access_token),
+            }
+            
+            if api_settings.UPDATE_LAST_LOGIN:
+                update_last_login(None, user)
+            
+            # Ajouter des infos utilisateur au token
+            data['user'] = {
+                'user_id': str(user.user_id),
+                'email': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'role': user.role,
+            }
+            
+            return data
         else:
             raise serializers.ValidationError('Email et mot de passe requis.')
 
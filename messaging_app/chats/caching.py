@@ -0,0 +1,59 @@
+import time
+
+from django.core.cache import cache
+
+
+# Conversation detail responses are cached for a short time only,
+# has_recent_activity depends on the current time
+CONVERSATION_CACHE_TIMEOUT = 15
+
+# The recent messages feed is shared for this many seconds
+RECENT_MESSAGES_BUCKET = 15
+
+
+def _version_key(conversation_id):
+    return f"conv_ver:{conversation_id}"
+
+
+def get_conversation_version(conversation_id):
+    """
+    Return the cache version of a conversation, creating it on first use
+    """
+    # A timestamp rather than a counter, so an evicted version never
+    # rolls back onto an older cached response
+    return cache.get_or_set(_version_key(conversation_id), time.time_ns, None)
+
+
+def bump_conversation_versions(conversation_ids):
+    """
+    Invalidate the cached responses of the given conversations
+    """
+    version = time.time_ns()
+    cache.set_many(
+        {_version_key(conversation_id): version for conversation_id in conversation_ids},
+        None
+    )
+
+
+def conversation_cache_key(user_id, conversation_id):
+    """
+    Build the response cache key of a conversation for a given user
+    """
+    version = get_conversation_version(conversation_id)
+    return f"conv:{user_id}:{conversation_id}:{version}"
+
+
+def bump_recent_messages_version(user_id):
+    """
+    Invalidate the cached recent messages feed of a user
+    """
+    cache.set(f"recent_ver:{user_id}", time.time_ns(), None)
+
+
+def recent_messages_cache_key(user_id):
+    """
+    Build the recent messages cache key of a user for the current time bucket
+    """
+    version = cache.get_or_set(f"recent_ver:{user_id}", time.time_ns, None)
+    bucket = int(time.time() // RECENT_MESSAGES_BUCKET)
+    return f"recent_msgs:{user_id}:{version}:{bucket}"
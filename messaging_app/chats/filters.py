@@ -1,6 +1,11 @@
+from datetime import timedelta
+
 import django_filters
-from django.db.models import Q
+from django.db.models import Q, Exists, OuterRef, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 from .models import Message, Conversation, User
 
 
@@ -38,7 +43,7 @@ class MessageFilter(django_filters.FilterSet):
     
     # Sender filtering
     sender = django_filters.ModelChoiceFilter(
-        queryset=User.objects.all(),
+        queryset=lambda request: User.objects.only('user_id'),
         field_name='sender',
         to_field_name='user_id',
         help_text='Filter messages by sender user ID'
@@ -51,7 +56,7 @@ class MessageFilter(django_filters.FilterSet):
     
     # Conversation filtering
     conversation = django_filters.ModelChoiceFilter(
-        queryset=Conversation.objects.all(),
+        queryset=lambda request: Conversation.objects.only('conversation_id'),
         field_name='conversation',
         to_field_name='conversation_id',
         help_text='Filter messages by conversation ID'
@@ -73,7 +78,7 @@ class MessageFilter(django_filters.FilterSet):
     class Meta:
         model = Message
         fields = {
-            'sent_at': ['exact', 'gte', 'lte'],
+            'sent_at': ['exact'],
             'sender': ['exact'],
             'conversation': ['exact'],
             'message_body': ['icontains'],
@@ -106,7 +111,7 @@ class ConversationFilter(django_filters.FilterSet):
     
     # Participant filtering
     participant = django_filters.ModelChoiceFilter(
-        queryset=User.objects.all(),
+        queryset=lambda request: User.objects.only('user_id'),
         field_name='participants',
         to_field_name='user_id',
         help_text='Filter conversations by participant user ID'
@@ -139,7 +144,7 @@ class ConversationFilter(django_filters.FilterSet):
     class Meta:
         model = Conversation
         fields = {
-            'created_at': ['exact', 'gte', 'lte'],
+            'created_at': ['exact'],
             'participants': ['exact'],
         }
     
@@ -153,39 +158,32 @@ class ConversationFilter(django_filters.FilterSet):
         """
         Filter conversations by exact number of participants
         """
-        return queryset.annotate(
-            participant_count=django_filters.Count('participants')
-        ).filter(participant_count=value)
+        return queryset.filter(participants_count=value)
     
     def filter_by_participants_count_gte(self, queryset, name, value):
         """
         Filter conversations with at least specified number of participants
         """
-        return queryset.annotate(
-            participant_count=django_filters.Count('participants')
-        ).filter(participant_count__gte=value)
+        return queryset.filter(participants_count__gte=value)
     
     def filter_by_participants_count_lte(self, queryset, name, value):
         """
         Filter conversations with at most specified number of participants
         """
-        return queryset.annotate(
-            participant_count=django_filters.Count('participants')
-        ).filter(participant_count__lte=value)
+        return queryset.filter(participants_count__lte=value)
     
     def filter_has_recent_messages(self, queryset, name, value):
         """
         Filter conversations that have messages in the last 24 hours
         """
-        from django.utils import timezone
-        from datetime import timedelta
+        recent_time = timezone.now() - timedelta(hours=24)
+        recent_exists = Exists(
+            Message.objects.filter(conversation=OuterRef('pk'), sent_at__gte=recent_time)
+        )
         
         if value:
-            recent_time = timezone.now() - timedelta(hours=24)
-            return queryset.filter(messages__sent_at__gte=recent_time).distinct()
-        else:
-            recent_time = timezone.now() - timedelta(hours=24)
-            return queryset.exclude(messages__sent_at__gte=recent_time)
+            return queryset.filter(recent_exists)
+        return queryset.filter(~recent_exists)
 
 
 class UserFilter(django_filters.FilterSet):
@@ -232,16 +230,50 @@ class UserFilter(django_filters.FilterSet):
             'username': ['exact', 'icontains'],
             'email': ['exact', 'icontains'],
             'role': ['exact'],
-            'created_at': ['exact', 'gte', 'lte'],
+            'created_at': ['exact'],
         }
     
     def filter_full_name(self, queryset, name, value):
         """
         Filter users by full name (combination of first_name and last_name)
         """
-        return queryset.filter(
-            Q(first_name__icontains=value) | 
-            Q(last_name__icontains=value) |
-            Q(first_name__icontains=value.split()[0] if ' ' in value else '') |
-            Q(last_name__icontains=value.split()[-1] if ' ' in value else '')
-        )
\ No newline at end of file
+        # A single predicate on "first_name last_name", served on PostgreSQL by
+        # the user_fullname_trgm index (see migration 0004)
+        return queryset.alias(
+            full_name=Concat('first_name', Value(' '), 'last_name')
+        ).filter(full_name__icontains=value)
+
+
+class ParticipantSearchFilter(SearchFilter):
+    """
+    Search filter for conversations on their participants' fields
+    Matches participants through a single EXISTS subquery instead of joining
+    the participants M2M table, so the results never need deduplication
+    """
+    participants_prefix = 'participants__'
+    
+    def filter_queryset(self, request, queryset, view):
+        """
+        Keep conversations having a participant that matches every search term
+        """
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        
+        if not search_fields or not search_terms:
+            return queryset
+        
+        # Lookups relative to User, e.g. 'participants__username' -> 'username__icontains'
+        orm_lookups = [
+            self.construct_search(str(search_field), queryset).removeprefix(self.participants_prefix)
+            for search_field in search_fields
+        ]
+        
+        condition = Q()
+        for term in search_terms:
+            term_condition = Q()
+            for orm_lookup in orm_lookups:
+                term_condition |= Q(**{orm_lookup: term})
+            condition &= term_condition
+        
+        matching_participants = User.objects.filter(condition, conversations=OuterRef('pk'))
+        return queryset.filter(Exists(matching_participants))
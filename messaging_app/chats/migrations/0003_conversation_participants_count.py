@@ -0,0 +1,34 @@
+# Generated by Django 5.2.2 on 2026-10-15 06:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_participants_count(apps, schema_editor):
+    Conversation = apps.get_model('chats', 'Conversation')
+    participant_totals = (
+        Conversation.participants.through.objects
+        .filter(conversation_id=OuterRef('pk'))
+        .order_by()
+        .values('conversation_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Conversation.objects.update(participants_count=Coalesce(Subquery(participant_totals), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0002_message_msg_conv_sent_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='participants_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(populate_participants_count, migrations.RunPython.noop),
+    ]
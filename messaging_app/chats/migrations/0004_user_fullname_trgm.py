@@ -0,0 +1,41 @@
+# Generated by Django 5.2.2 on 2026-10-15 06:54
+
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Concat, Upper
+
+# PostgreSQL only: a pg_trgm GIN index on the expression searched by
+# UserFilter.filter_full_name, so its ILIKE '%...%' can use an index
+# instead of scanning the user table. Other backends skip it.
+
+
+def fullname_trgm_index():
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    return GinIndex(
+        OpClass(Upper(Concat('first_name', Value(' '), 'last_name')), name='gin_trgm_ops'),
+        name='user_fullname_trgm',
+    )
+
+
+def create_fullname_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.add_index(apps.get_model('chats', 'User'), fullname_trgm_index())
+
+
+def drop_fullname_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('chats', 'User'), fullname_trgm_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0003_conversation_participants_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fullname_trgm_index, drop_fullname_trgm_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.2 on 2026-10-15 06:55
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def populate_last_message_at(apps, schema_editor):
+    Conversation = apps.get_model('chats', 'Conversation')
+    Message = apps.get_model('chats', 'Message')
+    latest_sent_at = (
+        Message.objects
+        .filter(conversation_id=OuterRef('pk'))
+        .order_by()
+        .values('conversation_id')
+        .annotate(latest=Max('sent_at'))
+        .values('latest')
+    )
+    Conversation.objects.update(last_message_at=Subquery(latest_sent_at))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_user_fullname_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+        migrations.RunPython(populate_last_message_at, migrations.RunPython.noop),
+    ]
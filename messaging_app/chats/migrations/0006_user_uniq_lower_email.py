@@ -0,0 +1,19 @@
+# Generated by Django 5.2.2 on 2026-10-15 07:03
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('chats', '0005_conversation_last_message_at'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='uniq_lower_email'),
+        ),
+    ]
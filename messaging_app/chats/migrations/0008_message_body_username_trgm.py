@@ -0,0 +1,43 @@
+# Generated by Django 5.2.2 on 2026-10-15 07:20
+
+from django.db import migrations
+from django.db.models.functions import Upper
+
+# PostgreSQL only: pg_trgm GIN indexes on the columns searched by the
+# SearchFilter of MessageViewSet. Its icontains lookups compile to
+# UPPER(col) LIKE UPPER('%...%'), so the indexes are on UPPER(col).
+# Other backends skip them.
+
+
+def trgm_indexes():
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    return [
+        ('Message', GinIndex(OpClass(Upper('message_body'), name='gin_trgm_ops'), name='msg_body_trgm')),
+        ('User', GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='user_username_trgm')),
+    ]
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for model_name, index in trgm_indexes():
+        schema_editor.add_index(apps.get_model('chats', model_name), index)
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, index in trgm_indexes():
+        schema_editor.remove_index(apps.get_model('chats', model_name), index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0007_conversationparticipant'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
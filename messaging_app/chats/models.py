@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 import uuid
 
@@ -17,18 +18,42 @@ class User(AbstractUser):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Emails are unique whatever their case, backed by a functional index
+            models.UniqueConstraint(Lower('email'), name='uniq_lower_email'),
+        ]
+    
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 class Conversation(models.Model):
     """Conversation - Canal de communication entre soldats"""
     conversation_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    participants = models.ManyToManyField(User, related_name='conversations')
+    participants = models.ManyToManyField(User, related_name='conversations', through='ConversationParticipant')
+    # Maintained by the m2m_changed and User delete receivers in chats.signals
+    participants_count = models.PositiveIntegerField(default=0, db_index=True)
+    # Set by the Message post_save receiver, recomputed on deletes, see chats.signals
+    last_message_at = models.DateTimeField(null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Conversation {self.conversation_id}"
 
+class ConversationParticipant(models.Model):
+    """Participation - Le lien entre une conversation et ses soldats"""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        # Same table as the auto-created through model it replaces
+        db_table = 'chats_conversation_participants'
+        unique_together = [('conversation', 'user')]
+        indexes = [
+            # Covers the conversations of a user, for the membership checks
+            models.Index(fields=['user', 'conversation'], name='participant_user_conv_idx'),
+        ]
+
 class Message(models.Model):
     """Message - Les communications sur le terrain"""
     message_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -39,6 +64,13 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['-sent_at']  # Messages les plus récents en premier
+        indexes = [
+            # Per-conversation and per-sender listings, newest first
+            models.Index(fields=['conversation', '-sent_at'], name='msg_conv_sent_idx'),
+            models.Index(fields=['sender', '-sent_at'], name='msg_sender_sent_idx'),
+            # Date range filters and the recent messages feed
+            models.Index(fields=['sent_at'], name='msg_sent_idx'),
+        ]
 
     def __str__(self):
         return f"Message de {self.sender.username} - {self.sent_at}"
@@ -1,9 +1,111 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from collections import OrderedDict
+from hashlib import md5
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.utils.functional import cached_property
 
 
-class MessagePagination(PageNumberPagination):
+class CachedCountPaginator(Paginator):
+    """
+    Django paginator whose total count is memoized in the cache
+    so that consecutive page fetches skip the COUNT query
+    
+    The cached count is only reported: pages are sliced from the query
+    itself, so a stale count never hides or clamps rows
+    """
+    
+    def __init__(self, object_list, per_page, cache_key=None, cache_timeout=30, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.cache_timeout = cache_timeout
+    
+    @cached_property
+    def count(self):
+        """
+        Return the cached total number of objects, counting them on a miss
+        """
+        count_objects = Paginator.count.func
+        if self.cache_key is None:
+            return count_objects(self)
+        return cache.get_or_set(self.cache_key, lambda: count_objects(self), self.cache_timeout)
+    
+    def page(self, number):
+        """
+        Return the requested page, read one row past its end to know
+        whether a next page exists instead of trusting the cached count
+        """
+        if self.cache_key is None or self.orphans:
+            return super().page(number)
+        
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        self._correct_count(bottom + len(rows), exact=not has_next)
+        return self._get_page(rows, number, self)
+    
+    def _correct_count(self, seen, exact):
+        """
+        Bring the cached count in line with the rows the page just read:
+        exact on the last page, at least one past the page otherwise
+        """
+        count = self.count
+        if exact:
+            correct = seen
+        else:
+            correct = max(count, seen + 1)
+        if correct != count:
+            self.__dict__['count'] = correct
+            self.__dict__.pop('num_pages', None)
+            cache.set(self.cache_key, correct, self.cache_timeout)
+
+
+class CachedCountPaginationMixin:
+    """
+    Pagination mixin caching the count of a listing for a short time,
+    keyed by endpoint, user and filter parameters
+    """
+    count_cache_timeout = 30
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_cache_key = self.get_count_cache_key(request, view)
+        return super().paginate_queryset(queryset, request, view)
+    
+    def django_paginator_class(self, object_list, per_page):
+        return CachedCountPaginator(
+            object_list,
+            per_page,
+            cache_key=self.count_cache_key,
+            cache_timeout=self.count_cache_timeout
+        )
+    
+    def get_count_cache_key(self, request, view):
+        """
+        Build the count cache key, ignoring the page parameters
+        which do not change the count
+        """
+        ignored = {self.page_query_param, self.page_size_query_param}
+        params = sorted(
+            (key, values) for key, values in request.query_params.lists() if key not in ignored
+        )
+        params_hash = md5(repr(params).encode(), usedforsecurity=False).hexdigest()
+        user_id = getattr(request.user, 'user_id', None)
+        return f"cnt:{view.__class__.__name__}:{request.path}:{user_id}:{params_hash}"
+
+
+class MessagePagination(CachedCountPaginationMixin, PageNumberPagination):
     """
     Custom pagination class specifically for messages
     Returns 20 messages per page with enhanced metadata
@@ -27,7 +129,25 @@ class MessagePagination(PageNumberPagination):
         ]))
 
 
-class ConversationPagination(PageNumberPagination):
+class KeysetMessagePagination(CursorPagination):
+    """
+    Keyset pagination for messages
+    Seeks past the cursor on sent_at instead of counting an OFFSET,
+    so deep pages of a long history cost the same as the first one
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-sent_at', '-message_id')
+    
+    def get_ordering(self, request, queryset, view):
+        """
+        Always use the keyset ordering, a cursor is only valid for it
+        """
+        return self.ordering
+
+
+class ConversationPagination(CachedCountPaginationMixin, PageNumberPagination):
     """
     Custom pagination class for conversations
     Returns 10 conversations per page
@@ -1,8 +1,90 @@
 from rest_framework import permissions
 from .models import Conversation, Message
 
+# Hashed once, checked on every object permission call
+_SAFE_METHODS = frozenset(permissions.SAFE_METHODS)
+_WRITE_METHODS = frozenset({'PUT', 'PATCH', 'DELETE'})
 
-class IsParticipantOfConversation(permissions.BasePermission):
+
+def _user_conversation_ids(request):
+    """
+    Return the ids of the conversations the current user participates in,
+    fetched once and cached on the request for the following object checks
+    """
+    conv_ids = getattr(request, '_user_conv_ids', None)
+    if conv_ids is None:
+        conv_ids = set(request.user.conversations.values_list('conversation_id', flat=True))
+        request._user_conv_ids = conv_ids
+    return conv_ids
+
+
+def _prefetched_participants(conversation):
+    """
+    Return the participants prefetched on the conversation, or None if they
+    were not prefetched (filtering them would bypass the prefetch cache)
+    """
+    if conversation is None:
+        return None
+    return getattr(conversation, '_prefetched_objects_cache', {}).get('participants')
+
+
+def _is_participant(request, conversation_id, conversation=None):
+    """
+    Check if the current user participates in the conversation
+    Walks the prefetched participants when available, otherwise falls back
+    to the conversation ids cached on the request
+    """
+    participants = _prefetched_participants(conversation)
+    if participants is not None:
+        user_id = request.user.user_id
+        return any(participant.user_id == user_id for participant in participants)
+    return conversation_id in _user_conversation_ids(request)
+
+
+def _is_message_participant(request, message):
+    """
+    Check if the current user participates in the message's conversation
+    """
+    # Only follow the relation if it was loaded with select_related
+    conversation = message.conversation if Message.conversation.is_cached(message) else None
+    return _is_participant(request, message.conversation_id, conversation)
+
+
+def _is_conversation_participant(request, conversation):
+    """
+    Check if the current user participates in the conversation
+    """
+    return _is_participant(request, conversation.conversation_id, conversation)
+
+
+# Participant check per object type, looked up with type(obj)
+_PARTICIPANT_CHECKS = {
+    Conversation: _is_conversation_participant,
+    Message: _is_message_participant,
+}
+
+
+class _ParticipantCheckMixin:
+    """
+    Participant check shared by the permission classes, memoized per
+    conversation on the request so that composed classes answer it once
+    """
+    
+    def _participates(self, request, obj):
+        check = _PARTICIPANT_CHECKS.get(type(obj))
+        if check is None:
+            return False
+        
+        # Both conversations and messages expose conversation_id
+        perm_cache = getattr(request, '_perm_cache', None)
+        if perm_cache is None:
+            perm_cache = request._perm_cache = {}
+        if obj.conversation_id not in perm_cache:
+            perm_cache[obj.conversation_id] = check(request, obj)
+        return perm_cache[obj.conversation_id]
+
+
+class IsParticipantOfConversation(_ParticipantCheckMixin, permissions.BasePermission):
     """
     Custom permission class to ensure only participants of a conversation
     can access, send, view, update and delete messages within that conversation.
@@ -18,18 +100,11 @@ class IsParticipantOfConversation(permissions.BasePermission):
         """
         Check if user is participant of the conversation for object-level permissions
         """
-        # Handle Conversation objects
-        if isinstance(obj, Conversation):
-            return obj.participants.filter(user_id=request.user.user_id).exists()
-        
-        # Handle Message objects - check if user is participant of the message's conversation
-        if isinstance(obj, Message):
-            return obj.conversation.participants.filter(user_id=request.user.user_id).exists()
-        
-        return False
+        # Conversations and messages - check if user is participant of the conversation
+        return self._participates(request, obj)
 
 
-class IsMessageSender(permissions.BasePermission):
+class IsMessageSender(_ParticipantCheckMixin, permissions.BasePermission):
     """
     Permission to allow only message sender to modify or delete their own messages
     """
@@ -38,13 +113,13 @@ class IsMessageSender(permissions.BasePermission):
         """
         Only allow sender to modify/delete their own messages
         """
-        if isinstance(obj, Message):
+        if type(obj) is Message:
             # For destructive operations, only sender can perform them
-            if request.method in ['PUT', 'PATCH', 'DELETE']:
-                return obj.sender.user_id == request.user.user_id
+            if request.method in _WRITE_METHODS:
+                return obj.sender_id == request.user.user_id
             
             # For read operations, check if user is participant
-            return obj.conversation.participants.filter(user_id=request.user.user_id).exists()
+            return self._participates(request, obj)
         
         return False
 
@@ -56,14 +131,14 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
         # Read permissions for any authenticated user
-        if request.method in permissions.SAFE_METHODS:
+        if request.method in _SAFE_METHODS:
             return True
         
         # Write permissions only for owner
         return obj.owner == request.user
 
 
-class CanAccessOwnDataOnly(permissions.BasePermission):
+class CanAccessOwnDataOnly(_ParticipantCheckMixin, permissions.BasePermission):
     """
     General permission: users can only access their own data
     """
@@ -73,13 +148,9 @@ class CanAccessOwnDataOnly(permissions.BasePermission):
         return request.user and request.user.is_authenticated
     
     def has_object_permission(self, request, view, obj):
-        # For messages: check if user is participant in conversation
-        if isinstance(obj, Message):
-            return obj.conversation.participants.filter(user_id=request.user.user_id).exists()
-        
-        # For conversations: check if user is participant
-        if isinstance(obj, Conversation):
-            return obj.participants.filter(user_id=request.user.user_id).exists()
+        # For messages and conversations: check if user is participant in conversation
+        if type(obj) in _PARTICIPANT_CHECKS:
+            return self._participates(request, obj)
         
         # For other objects, check if user is the owner
         if hasattr(obj, 'user'):
@@ -1,79 +1,122 @@
+import re
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 from .models import User, Conversation, Message
 
+# Compiled once: a single case-insensitive scan per message body
+FORBIDDEN_WORDS_RE = re.compile(r'spam|hack|virus', re.IGNORECASE)
+
+RECENT_ACTIVITY_WINDOW = timedelta(hours=24)
+
+
+def get_recent_cutoff(context):
+    """
+    Return the datetime after which messages count as recent,
+    computed once and shared by every serializer of the same context
+    """
+    if 'recent_cutoff' not in context:
+        context['recent_cutoff'] = timezone.now() - RECENT_ACTIVITY_WINDOW
+    return context['recent_cutoff']
+
+
+def get_message_length(message):
+    """
+    Return the length of a message body
+    """
+    # Querysets of the viewsets annotate the length computed by the database
+    length = getattr(message, 'message_length_db', None)
+    if length is None:
+        length = len(message.message_body)
+    return length
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for soldiers - User data"""
     password = serializers.CharField(write_only=True, min_length=8)
     confirm_password = serializers.CharField(write_only=True)
     class Meta:
         model = User
-        fields = ['user_id', 'username', 'password','first_name', 'last_name', 'email', 'phone_number', 'role', 'created_at']
+        fields = ['user_id', 'username', 'password', 'confirm_password', 'first_name', 'last_name', 'email', 'phone_number', 'role', 'created_at']
         read_only_fields = ['user_id', 'created_at']
         extra_kwargs = {
             'password': {'write_only': True}
         }
     
-    def get_full_name(self, obj):
-        """Method to obtain the full name"""
-        return f"{obj.first_name} {obj.last_name}".strip()
-    
     def validate_email(self, value):
         """Method to validate email"""
-        if User.objects.filter(email=value).exclude(user_id=self.instance.user_id if self.instance else None).exists():
+        if User.objects.filter(email__iexact=value).exclude(pk=getattr(self.instance, 'pk', None)).exists():
             raise serializers.ValidationError("Email already exists")
         return value
     
-    def validate(self, value):
+    def validate(self, attrs):
         """Method to validate password"""
-        if 'password' in value and 'confirm_password' in value:
-            if value['password'] != value['confirm_password']:
-                raise serializers.ValidationError("Passwords do not match")
-        
-        data.pop('confirm_password', None)
-        return value
+        # confirm_password is not a model field, drop it once checked
+        if attrs.get('password') != attrs.pop('confirm_password', None):
+            raise serializers.ValidationError("Passwords do not match")
+        return attrs
 
 class MessageSerializer(serializers.ModelSerializer):
     """Serializer for messages - Communications"""
-    sender = UserSerializer(read_only=True)
-    sender_username = serializers.CharField(source='sender.username', read_only=True)
-    conversation_id = serializers.UUIDField(source='conversation.conversation_id', read_only=True)
+    sender = serializers.SlugRelatedField(slug_field='username', read_only=True)
+    # Trimming, emptiness and length are checked by the field itself
+    message_body = serializers.CharField(
+        max_length=1000,
+        trim_whitespace=True,
+        allow_blank=False,
+        error_messages={
+            'blank': "Message body cannot be empty, soldier",
+            'max_length': "Message body cannot be longer than 1000 characters, soldier"
+        }
+    )
+    # Read from the foreign key column, the conversation row is not needed
+    conversation_id = serializers.UUIDField(read_only=True)
     message_length = serializers.SerializerMethodField()
     is_recent = serializers.SerializerMethodField()
     
     class Meta:
         model = Message
-        fields = ['message_id', 'sender', 'sender_username', 'conversation_id', 'message_body', 'sent_at', 'message_length', 'is_recent']
+        fields = ['message_id', 'sender', 'conversation_id', 'message_body', 'sent_at', 'message_length', 'is_recent']
         read_only_fields = ['message_id', 'sender', 'sent_at']
     
     def get_message_length(self, obj):
         """Method to get the length of the message"""
-        return len(obj.message_body)
+        return get_message_length(obj)
     
     def get_is_recent(self, obj):
         """Method to check if the message is recent"""
-        from django.utils import timezone
-        from datetime import timedelta
-        return obj.sent_at >= timezone.now() - timedelta(hours=24)
+        return obj.sent_at >= get_recent_cutoff(self.context)
     
     def validate_message_body(self, value):
         """Method to validate message body"""
-        if not value or not value.strip():
-            raise serializers.validationError("Message body cannot be empty, soldier")
-        
-        if len(value) > 1000:
-            raise serializers.validationError("Message body cannot be longer than 1000 characters, soldier")
+        if FORBIDDEN_WORDS_RE.search(value):
+            raise serializers.ValidationError("Message body contains forbidden words, soldier")
         
-        forbidden_words = ['spam', 'hack', 'virus']
-        if any(word in value.lower() for word in forbidden_words):
-            raise serializers.validationError("Message body contains forbidden words, soldier")
-        
-        return value.strip()
+        return value
+
+class MessageListSerializer(serializers.BaseSerializer):
+    """Read-only serializer for message listings - same output as MessageSerializer"""
+    # Plain attribute reads instead of one field object per column
+    sent_at_field = serializers.DateTimeField()
+    
+    def to_representation(self, obj):
+        return {
+            'message_id': str(obj.message_id),
+            'sender': obj.sender.username,
+            'conversation_id': str(obj.conversation_id),
+            'message_body': obj.message_body,
+            'sent_at': self.sent_at_field.to_representation(obj.sent_at),
+            'message_length': get_message_length(obj),
+            'is_recent': obj.sent_at >= get_recent_cutoff(self.context)
+        }
 
 class ConversationSerializer(serializers.ModelSerializer):
     """Serializer for conversations - Communication channels"""
     participants = UserSerializer(many=True, read_only=True)
-    messages = MessageSerializer(many=True, read_only=True)
-    participant_count = serializers.SerializerMethodField()
+    # Latest messages prefetched by ConversationViewSet
+    messages = MessageSerializer(many=True, read_only=True, source='latest_messages')
+    participant_count = serializers.IntegerField(source='participants_count', read_only=True)
     latest_message = serializers.SerializerMethodField()
     has_recent_activity = serializers.SerializerMethodField()
     
@@ -82,35 +125,39 @@ class ConversationSerializer(serializers.ModelSerializer):
         fields = ['conversation_id', 'participants', 'participant_count', 'messages', 'latest_message', 'has_recent_activity', 'created_at']
         read_only_fields = ['conversation_id', 'created_at']
     
-    def get_participant_count(self, obj):
-        """Get the number of participants in the conversation"""
-        return obj.participants.count()
-    
     def get_latest_message(self, obj):
         """Get the latest message in the conversation"""
-        latest = obj.messages.first()
-        if latest:
-            return {
-                'message_body': latest.message_body,
-                'sender': latest.sender.username,
-                'sent_at': latest.sent_at
-            }
-        return None
+        # Annotated by ConversationViewSet, absent on a conversation just created
+        if getattr(obj, 'latest_sent_at', None) is None:
+            return None
+        return {
+            'message_body': obj.latest_body,
+            'sender': obj.latest_sender,
+            'sent_at': obj.latest_sent_at
+        }
     
     def get_has_recent_activity(self, obj):
         """Check if the conversation has recent activity"""
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        latest_message = obj.messages.first()
-        if latest_message:
-            return latest_message.sent_at >= timezone.now() - timedelta(hours=24)
+        # The annotated latest message is exact, last_message_at is kept
+        # for conversations read without the annotation
+        if hasattr(obj, 'latest_sent_at'):
+            last_activity = obj.latest_sent_at
+        else:
+            last_activity = obj.last_message_at
+        if last_activity:
+            return last_activity >= get_recent_cutoff(self.context)
         return False
     
     def validate(self, data):
         """Validate the conversation data"""
         return data
 
+class ConversationListSerializer(ConversationSerializer):
+    """Serializer for conversation listings - without the message history"""
+    
+    class Meta(ConversationSerializer.Meta):
+        fields = ['conversation_id', 'participants', 'participant_count', 'latest_message', 'has_recent_activity', 'created_at']
+
 class ConversationCreateSerializer(serializers.Serializer):
     """Special serializer for creating conversations"""
     participant_ids = serializers.ListField(
@@ -125,10 +172,10 @@ class ConversationCreateSerializer(serializers.Serializer):
             raise serializers.ValidationError("Participants must be unique!")
         
         # Vérifier que tous les utilisateurs existent
-        existing_users = User.objects.filter(user_id__in=value)
-        if existing_users.count() != len(value):
-            existing_ids = set(str(user.user_id) for user in existing_users)
-            missing_ids = set(str(uid) for uid in value) - existing_ids
+        # The users are kept for the response of ConversationViewSet.create
+        self.participant_users = User.objects.in_bulk(value)
+        missing_ids = set(str(uid) for uid in set(value) - self.participant_users.keys())
+        if missing_ids:
             raise serializers.ValidationError(f"Users with IDs {missing_ids} do not exist")
         
         return value
@@ -137,40 +184,22 @@ class MessageCreateSerializer(serializers.Serializer):
     """Serializer for creating messages"""
     conversation_id = serializers.UUIDField(help_text="UUID for the conversation")
     sender_id = serializers.UUIDField(help_text="UUID for the sender")
-    message_body = serializers.CharField(max_length=1000, help_text="Message body")
-    
-    def validate_message_body(self, value):
-        """check if the message body is valid"""
-        if not value or not value.strip():
-            raise serializers.ValidationError("Message empty!")
-        
-        if len(value) > 1000:
-            raise serializers.ValidationError("Message too long!")
-        
-        return value.strip()
-    
-    def validate_conversation_id(self, value):
-        """Check if the conversation exists"""
-        if not Conversation.objects.filter(conversation_id=value).exists():
-            raise serializers.ValidationError("Conversation not found!")
-        return value
-    
-    def validate_sender_id(self, value):
-        """Check if the sender exists"""
-        if not User.objects.filter(user_id=value).exists():
-            raise serializers.ValidationError("Sender not found!")
-        return value
+    message_body = serializers.CharField(
+        max_length=1000,
+        trim_whitespace=True,
+        allow_blank=False,
+        error_messages={'blank': "Message empty!", 'max_length': "Message too long!"},
+        help_text="Message body"
+    )
     
     def validate(self, data):
         """Validate the sender and conversation"""
-        try:
-            conversation = Conversation.objects.get(conversation_id=data['conversation_id'])
-            sender = User.objects.get(user_id=data['sender_id'])
-            
-            if sender not in conversation.participants.all():
-                raise serializers.ValidationError("Sender not in conversation!")
-            
-        except (Conversation.DoesNotExist, User.DoesNotExist):
-            raise serializers.ValidationError("Conversation or User not found!")
+        # A single EXISTS covers a missing conversation, a missing sender
+        # and a sender outside the conversation
+        if not Conversation.objects.filter(
+            conversation_id=data['conversation_id'],
+            participants__user_id=data['sender_id']
+        ).exists():
+            raise serializers.ValidationError("Sender not in conversation or not found!")
         
         return data
\ No newline at end of file
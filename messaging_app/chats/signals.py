@@ -0,0 +1,133 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .caching import bump_conversation_versions
+from .models import Conversation, Message, User
+
+
+def refresh_participants_count(conversation_ids):
+    """
+    Recompute the denormalized participants_count of the given conversations
+    from the participants through table, in a single UPDATE
+    """
+    participant_totals = (
+        Conversation.participants.through.objects
+        .filter(conversation_id=OuterRef('pk'))
+        .order_by()
+        .values('conversation_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Conversation.objects.filter(pk__in=conversation_ids).update(
+        participants_count=Coalesce(Subquery(participant_totals), 0)
+    )
+
+
+def refresh_last_message_at(conversation_ids):
+    """
+    Recompute last_message_at of the given conversations from their
+    remaining messages, in a single UPDATE
+    """
+    latest = (
+        Message.objects
+        .filter(conversation_id=OuterRef('pk'))
+        .order_by('-sent_at')
+        .values('sent_at')[:1]
+    )
+    Conversation.objects.filter(pk__in=conversation_ids).update(
+        last_message_at=Subquery(latest)
+    )
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def update_participants_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal receiver that keeps Conversation.participants_count in sync
+    when participants are added, removed or cleared, from either side
+    of the relation.
+    """
+    if action in ('post_add', 'post_remove') and not pk_set:
+        return
+    
+    if action == 'post_add':
+        # pk_set only holds the rows that were actually inserted
+        if reverse:
+            # user.conversations.add(...): one more participant per conversation
+            Conversation.objects.filter(pk__in=pk_set).update(
+                participants_count=F('participants_count') + 1
+            )
+        else:
+            Conversation.objects.filter(pk=instance.pk).update(
+                participants_count=F('participants_count') + len(pk_set)
+            )
+    
+    elif action == 'post_remove':
+        # pk_set may name users that were not participants, so recount
+        refresh_participants_count(pk_set if reverse else [instance.pk])
+    
+    elif action == 'pre_clear' and reverse:
+        # Remember the user's conversations before the rows are deleted
+        instance._cleared_conversation_ids = list(
+            instance.conversations.values_list('conversation_id', flat=True)
+        )
+    
+    elif action == 'post_clear':
+        if reverse:
+            refresh_participants_count(getattr(instance, '_cleared_conversation_ids', []))
+        else:
+            Conversation.objects.filter(pk=instance.pk).update(participants_count=0)
+    
+    # Membership changed: cached conversation responses are stale
+    if action in ('post_add', 'post_remove'):
+        bump_conversation_versions(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        bump_conversation_versions(
+            getattr(instance, '_cleared_conversation_ids', []) if reverse else [instance.pk]
+        )
+
+
+@receiver(pre_delete, sender=User)
+def remember_user_conversations(sender, instance, **kwargs):
+    """
+    Signal receiver that records the conversations of a user about to be
+    deleted: the cascade removes their participant rows without m2m_changed.
+    """
+    instance._deleted_conversation_ids = list(
+        instance.conversations.values_list('conversation_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=User)
+def update_participants_count_on_user_delete(sender, instance, **kwargs):
+    """
+    Signal receiver that recounts the participants of the conversations
+    a deleted user belonged to.
+    """
+    conversation_ids = getattr(instance, '_deleted_conversation_ids', [])
+    if conversation_ids:
+        refresh_participants_count(conversation_ids)
+        # Their messages went with them
+        refresh_last_message_at(conversation_ids)
+        bump_conversation_versions(conversation_ids)
+
+
+@receiver(post_save, sender=Message)
+def update_last_message_at(sender, instance, created, **kwargs):
+    """
+    Signal receiver that records the time of the latest message
+    on its conversation, so conversations can be ordered by activity.
+    """
+    if created:
+        Conversation.objects.filter(pk=instance.conversation_id).update(
+            last_message_at=instance.sent_at
+        )
+
+
+@receiver(post_save, sender=Message)
+def invalidate_conversation_cache(sender, instance, **kwargs):
+    """
+    Signal receiver that rolls the cache version of a conversation
+    whenever one of its messages is written.
+    """
+    bump_conversation_versions([instance.conversation_id])
@@ -1,3 +1,342 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models.functions import Length
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .models import User, Conversation, Message
+from .serializers import MessageListSerializer, MessageSerializer
+
+
+class ChatsTestCase(TestCase):
+    """
+    Base test case - Deux soldats, une conversation, un client authentifié
+    """
+
+    def setUp(self):
+        # Counts, responses and versions live in the cache, start clean
+        cache.clear()
+        self.alice = self.create_user('alice')
+        self.bob = self.create_user('bob')
+        self.carol = self.create_user('carol')
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.alice, self.bob)
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def create_user(self, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='secret123',
+            first_name=username.title(),
+            last_name='Test'
+        )
+
+    def participants_count(self, conversation):
+        return Conversation.objects.values_list('participants_count', flat=True).get(pk=conversation.pk)
+
+    def conversation_url(self, conversation, suffix=''):
+        return f'/api/conversations/{conversation.conversation_id}/{suffix}'
+
+
+class ParticipantsCountTests(ChatsTestCase):
+    """
+    The denormalized participants_count follows every change of the participants
+    """
+
+    def test_add(self):
+        self.assertEqual(self.participants_count(self.conversation), 2)
+        self.conversation.participants.add(self.carol)
+        self.assertEqual(self.participants_count(self.conversation), 3)
+
+    def test_add_existing_participant(self):
+        self.conversation.participants.add(self.bob)
+        self.assertEqual(self.participants_count(self.conversation), 2)
+
+    def test_add_from_user_side(self):
+        other = Conversation.objects.create()
+        self.carol.conversations.add(self.conversation, other)
+        self.assertEqual(self.participants_count(self.conversation), 3)
+        self.assertEqual(self.participants_count(other), 1)
+
+    def test_remove(self):
+        self.conversation.participants.remove(self.bob)
+        self.assertEqual(self.participants_count(self.conversation), 1)
+
+    def test_remove_non_participant(self):
+        self.conversation.participants.remove(self.carol)
+        self.assertEqual(self.participants_count(self.conversation), 2)
+
+    def test_remove_from_user_side(self):
+        self.bob.conversations.remove(self.conversation)
+        self.assertEqual(self.participants_count(self.conversation), 1)
+
+    def test_clear(self):
+        self.conversation.participants.clear()
+        self.assertEqual(self.participants_count(self.conversation), 0)
+
+    def test_clear_from_user_side(self):
+        other = Conversation.objects.create()
+        other.participants.add(self.bob, self.carol)
+        self.bob.conversations.clear()
+        self.assertEqual(self.participants_count(self.conversation), 1)
+        self.assertEqual(self.participants_count(other), 1)
+
+    def test_create_conversation(self):
+        response = self.client.post(
+            '/api/conversations/',
+            {'participant_ids': [str(self.bob.user_id), str(self.carol.user_id)]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        conversation = Conversation.objects.get(pk=response.data['conversation_id'])
+        self.assertEqual(self.participants_count(conversation), 3)
+
+    def test_add_participant_action(self):
+        response = self.client.post(
+            self.conversation_url(self.conversation, 'add_participant/'),
+            {'user_ids': [str(self.carol.user_id)]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.participants_count(self.conversation), 3)
+
+    def test_user_deleted(self):
+        self.bob.delete()
+        self.assertEqual(self.participants_count(self.conversation), 1)
+
+    def test_last_participant_cannot_leave_after_user_deleted(self):
+        self.bob.delete()
+        response = self.client.delete(
+            self.conversation_url(self.conversation, 'remove_participant/'),
+            {'user_id': str(self.alice.user_id)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_add_participant_rejects_non_list(self):
+        response = self.client.post(
+            self.conversation_url(self.conversation, 'add_participant/'),
+            {'user_ids': 5},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.participants_count(self.conversation), 2)
+
+
+class LastMessageAtTests(ChatsTestCase):
+    """
+    last_message_at records the time of the latest message
+    """
+
+    def test_new_message(self):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=self.bob, message_body='Bonjour'
+        )
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message_at, message.sent_at)
+
+    def test_latest_message_deleted(self):
+        first = Message.objects.create(
+            conversation=self.conversation, sender=self.bob, message_body='Premier'
+        )
+        latest = Message.objects.create(
+            conversation=self.conversation, sender=self.alice, message_body='Dernier'
+        )
+        response = self.client.delete(f'/api/messages/{latest.message_id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message_at, first.sent_at)
+
+    def test_only_message_deleted(self):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=self.alice, message_body='Seul'
+        )
+        self.client.delete(f'/api/messages/{message.message_id}/')
+        self.conversation.refresh_from_db()
+        self.assertIsNone(self.conversation.last_message_at)
+
+    def test_sender_deleted(self):
+        Message.objects.create(conversation=self.conversation, sender=self.bob, message_body='Adieu')
+        self.bob.delete()
+        self.conversation.refresh_from_db()
+        self.assertIsNone(self.conversation.last_message_at)
+
+
+class RecentActivityTests(ChatsTestCase):
+    """
+    has_recent_activity agrees with the latest message shown next to it
+    """
+
+    def test_only_message_deleted(self):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=self.alice, message_body='Seul'
+        )
+        self.assertTrue(self.client.get('/api/conversations/').data['results'][0]['has_recent_activity'])
+        response = self.client.delete(f'/api/messages/{message.message_id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        for data in (
+            self.client.get('/api/conversations/').data['results'][0],
+            self.client.get(self.conversation_url(self.conversation)).data
+        ):
+            self.assertIsNone(data['latest_message'])
+            self.assertFalse(data['has_recent_activity'])
+
+
+class ConversationCacheTests(ChatsTestCase):
+    """
+    Cached conversation details never outlive the data they show
+    """
+
+    def get_detail(self, client=None):
+        return (client or self.client).get(self.conversation_url(self.conversation))
+
+    def test_new_message_invalidates(self):
+        self.assertEqual(len(self.get_detail().data['messages']), 0)
+        Message.objects.create(conversation=self.conversation, sender=self.bob, message_body='Salut')
+        self.assertEqual(len(self.get_detail().data['messages']), 1)
+
+    def test_message_update_invalidates(self):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=self.alice, message_body='Avant'
+        )
+        self.get_detail()
+        response = self.client.patch(
+            f'/api/messages/{message.message_id}/', {'message_body': 'Apres'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_detail().data['messages'][0]['message_body'], 'Apres')
+
+    def test_message_delete_invalidates(self):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=self.alice, message_body='Oups'
+        )
+        self.assertEqual(len(self.get_detail().data['messages']), 1)
+        response = self.client.delete(f'/api/messages/{message.message_id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(self.get_detail().data['messages']), 0)
+
+    def test_conversation_delete(self):
+        self.assertEqual(self.get_detail().status_code, status.HTTP_200_OK)
+        response = self.client.delete(self.conversation_url(self.conversation))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.get_detail().status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_participant_added(self):
+        self.get_detail()
+        self.conversation.participants.add(self.carol)
+        self.assertEqual(self.get_detail().data['participant_count'], 3)
+
+    def test_removed_participant_loses_access(self):
+        bob_client = APIClient()
+        bob_client.force_authenticate(self.bob)
+        self.assertEqual(self.get_detail(bob_client).status_code, status.HTTP_200_OK)
+        self.conversation.participants.remove(self.bob)
+        self.assertEqual(self.get_detail(bob_client).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MessageLengthTests(ChatsTestCase):
+    """
+    message_length always matches the body in the response
+    """
+
+    def test_update_returns_new_length(self):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=self.alice, message_body='Court'
+        )
+        body = 'Un message bien plus long'
+        response = self.client.patch(
+            f'/api/messages/{message.message_id}/', {'message_body': body}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message_length'], len(body))
+
+
+class PaginationTests(ChatsTestCase):
+    """
+    Paginated listings show the rows written since the count was cached
+    """
+
+    def test_conversations_after_create(self):
+        self.assertEqual(self.client.get('/api/conversations/').data['count'], 1)
+        for _ in range(2):
+            conversation = Conversation.objects.create()
+            conversation.participants.add(self.alice)
+        response = self.client.get('/api/conversations/')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_conversation_messages_after_create(self):
+        url = self.conversation_url(self.conversation, 'messages/')
+        for i in range(3):
+            Message.objects.create(conversation=self.conversation, sender=self.bob, message_body=f'm{i}')
+        self.assertEqual(self.client.get(url).data['count'], 3)
+        Message.objects.create(conversation=self.conversation, sender=self.bob, message_body='m3')
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(len(response.data['results']), 4)
+
+    def test_next_page_after_create(self):
+        for i in range(20):
+            Message.objects.create(conversation=self.conversation, sender=self.bob, message_body=f'm{i}')
+        response = self.client.get('/api/messages/')
+        self.assertEqual(response.data['count'], 20)
+        self.assertIsNone(response.data['next'])
+        Message.objects.create(conversation=self.conversation, sender=self.bob, message_body='m20')
+        response = self.client.get('/api/messages/')
+        self.assertIsNotNone(response.data['next'])
+        response = self.client.get('/api/messages/?page=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['count'], 21)
+
+    def test_page_past_the_end(self):
+        response = self.client.get('/api/messages/?page=2')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MessageListSerializerTests(ChatsTestCase):
+    """
+    The listing serializer writes exactly what MessageSerializer writes
+    """
+
+    def assertSameOutput(self, message):
+        context = {}
+        self.assertEqual(
+            MessageListSerializer(message, context=context).data,
+            MessageSerializer(message, context=context).data
+        )
+
+    def test_same_output(self):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=self.bob, message_body='Même sortie'
+        )
+        self.assertSameOutput(message)
+
+    def test_same_output_annotated(self):
+        Message.objects.create(conversation=self.conversation, sender=self.bob, message_body='Annoté')
+        message = Message.objects.select_related('sender').annotate(
+            message_length_db=Length('message_body')
+        ).get()
+        self.assertSameOutput(message)
+
+    def test_same_output_old_message(self):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=self.bob, message_body='Ancien'
+        )
+        Message.objects.filter(pk=message.pk).update(sent_at=message.sent_at - timedelta(days=2))
+        message.refresh_from_db()
+        self.assertSameOutput(message)
+
+
+class MigrationTests(TestCase):
+    """
+    The migrations, the through model included, describe the current models
+    """
 
-# Create your tests here.
+    def test_no_missing_migrations(self):
+        call_command('makemigrations', 'chats', check=True, dry_run=True, verbosity=0)
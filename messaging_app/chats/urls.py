@@ -11,6 +11,7 @@ router = routers.DefaultRouter()
 # - conversations/ (GET, POST)
 # - conversations/{id}/ (GET, PUT, PATCH, DELETE)
 # - messages/ (GET, POST) 
+# - messages/history/ (GET, cursor paginated)
 # - messages/{id}/ (GET, PUT, PATCH, DELETE)
 router.register(r'conversations', ConversationViewSet, basename='conversation')
 router.register(r'messages', MessageViewSet, basename='message')
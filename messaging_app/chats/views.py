@@ -1,21 +1,50 @@
+import uuid
+from datetime import timedelta
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
+from django.core.cache import cache
+from django.http import Http404
+from django.utils import timezone
 from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Length
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import User, Conversation, Message
 from .serializers import (
     ConversationSerializer, 
+    ConversationListSerializer,
     MessageSerializer, 
     ConversationCreateSerializer,
-    MessageCreateSerializer
+    MessageCreateSerializer,
+    MessageListSerializer,
+    get_recent_cutoff
 )
 from .permissions import IsParticipantOfConversation, IsMessageSender
-from .filters import MessageFilter, ConversationFilter
-from .pagination import MessagePagination, ConversationPagination
+from .filters import MessageFilter, ConversationFilter, ParticipantSearchFilter
+from .pagination import MessagePagination, ConversationPagination, KeysetMessagePagination
+from .caching import (
+    CONVERSATION_CACHE_TIMEOUT,
+    RECENT_MESSAGES_BUCKET,
+    bump_conversation_versions,
+    bump_recent_messages_version,
+    conversation_cache_key,
+    recent_messages_cache_key
+)
+from .signals import refresh_last_message_at
+
+# Columns rendered by MessageSerializer for the messages of a known conversation
+CONVERSATION_MESSAGE_FIELDS = (
+    'message_id', 'message_body', 'sent_at', 'conversation',
+    'sender__user_id', 'sender__username',
+)
+
+# Latest messages embedded in a conversation detail, older ones are paginated
+# by the messages action
+CONVERSATION_DETAIL_MESSAGES = 50
 
 
 class ConversationViewSet(viewsets.ModelViewSet):
@@ -23,33 +52,96 @@ class ConversationViewSet(viewsets.ModelViewSet):
     ViewSet for managing conversations - Communication channels management
     Provides CRUD operations for conversations between users
     """
-    queryset = Conversation.objects.all()
+    queryset = Conversation.objects.none()
     serializer_class = ConversationSerializer
+    # Serializers of the actions that do not use serializer_class
+    action_serializer_classes = {
+        'create': ConversationCreateSerializer,
+        'list': ConversationListSerializer,
+    }
     permission_classes = [IsAuthenticated, IsParticipantOfConversation]
     pagination_class = ConversationPagination
     lookup_field = 'conversation_id'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ParticipantSearchFilter, filters.OrderingFilter]
     filterset_class = ConversationFilter
     search_fields = ['participants__username', 'participants__first_name', 'participants__last_name']
-    ordering_fields = ['created_at']
+    ordering_fields = ['created_at', 'last_message_at']
     ordering = ['-created_at']  # Default ordering: newest first
+    # Actions answering with the full ConversationSerializer
+    detail_actions = frozenset({'retrieve', 'update', 'partial_update'})
     
     def get_queryset(self):
         """
         Filter conversations to show only those where current user is participant
         """
         user = self.request.user
-        return Conversation.objects.filter(participants=user).prefetch_related(
-            'participants', 'messages'
-        )
+        queryset = Conversation.objects.filter(participants=user).prefetch_related('participants')
+        
+        if self.action == 'list' or self.action in self.detail_actions:
+            # The latest message is read by correlated subqueries
+            latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-sent_at')
+            queryset = queryset.annotate(
+                latest_body=Subquery(latest.values('message_body')[:1]),
+                latest_sender=Subquery(latest.values('sender__username')[:1]),
+                latest_sent_at=Subquery(latest.values('sent_at')[:1])
+            )
+        
+        if self.action in self.detail_actions:
+            # The detail serializes the latest messages of the conversation
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'messages',
+                    queryset=Message.objects.select_related('sender').only(
+                        *CONVERSATION_MESSAGE_FIELDS
+                    ).annotate(
+                        message_length_db=Length('message_body')
+                    ).order_by('-sent_at')[:CONVERSATION_DETAIL_MESSAGES],
+                    # Sliced prefetches can only be stored in their own attribute
+                    to_attr='latest_messages'
+                )
+            )
+        
+        return queryset
     
     def get_serializer_class(self):
         """
         Return appropriate serializer based on action
         """
-        if self.action == 'create':
-            return ConversationCreateSerializer
-        return ConversationSerializer
+        return self.action_serializer_classes.get(self.action, self.serializer_class)
+    
+    def get_serializer_context(self):
+        """
+        Share one 'recent' cutoff between all the serialized objects
+        """
+        context = super().get_serializer_context()
+        get_recent_cutoff(context)
+        return context
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve a conversation, serving it from the cache while it is unchanged
+        """
+        # Only participants may be served, cached entry or not: one probe
+        # of the participants table stands in for get_object()
+        try:
+            conversation_id = uuid.UUID(str(kwargs[self.lookup_field]))
+        except ValueError:
+            raise Http404("No Conversation matches the given query.")
+        if not Conversation.participants.through.objects.filter(
+            conversation_id=conversation_id,
+            user_id=request.user.user_id
+        ).exists():
+            raise Http404("No Conversation matches the given query.")
+        
+        # The key rolls on every message, participant or deletion change
+        cache_key = conversation_cache_key(request.user.user_id, conversation_id)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+        
+        response = super().retrieve(request, *args, **kwargs)
+        cache.set(cache_key, response.data, CONVERSATION_CACHE_TIMEOUT)
+        return response
     
     def create(self, request, *args, **kwargs):
         """
@@ -58,22 +150,32 @@ class ConversationViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        participant_ids = serializer.validated_data['participant_ids']
+        # Users loaded by the serializer while validating participant_ids
+        participants = dict(serializer.participant_users)
+        
+        # Ensure current user is always a participant
+        participants.setdefault(request.user.user_id, request.user)
+        participant_ids = participants.keys()
         
         # Create conversation with transaction to ensure data integrity
         with transaction.atomic():
-            conversation = Conversation.objects.create()
+            # bulk_create does not send m2m_changed, so the count is set here
+            conversation = Conversation.objects.create(participants_count=len(participant_ids))
             
-            # Add current user as participant automatically
-            participants = User.objects.filter(user_id__in=participant_ids)
-            conversation.participants.set(participants)
+            # One multi-row INSERT into the participants table
+            Participant = Conversation.participants.through
+            Participant.objects.bulk_create([
+                Participant(conversation_id=conversation.pk, user_id=user_id)
+                for user_id in participant_ids
+            ])
             
-            # Ensure current user is always a participant
-            if request.user not in conversation.participants.all():
-                conversation.participants.add(request.user)
+            # A new conversation has no messages yet, and its participants
+            # are already loaded
+            conversation.latest_messages = []
+            conversation._prefetched_objects_cache = {'participants': list(participants.values())}
             
             # Serialize the created conversation for response
-            response_serializer = ConversationSerializer(conversation)
+            response_serializer = ConversationSerializer(conversation, context=self.get_serializer_context())
             
             return Response(
                 response_serializer.data, 
@@ -88,38 +190,76 @@ class ConversationViewSet(viewsets.ModelViewSet):
         conversation = self.get_object()
         
         # Permission check is handled by IsParticipantOfConversation
-        messages = conversation.messages.all()
-        serializer = MessageSerializer(messages, many=True)
+        # Rows are read as dicts in the shape of MessageSerializer,
+        # without building model instances or running the serializer
+        messages = conversation.messages.order_by('-sent_at').values(
+            'message_id',
+            'conversation_id',
+            'message_body',
+            'sent_at',
+            'sender__username',
+            message_length=Length('message_body')
+        )
         
-        return Response(serializer.data)
+        paginator = MessagePagination()
+        page = paginator.paginate_queryset(messages, request, view=self)
+        
+        recent_cutoff = get_recent_cutoff({})
+        for message in page:
+            message['sender'] = message.pop('sender__username')
+            message['is_recent'] = message['sent_at'] >= recent_cutoff
+            # Rendered in the current time zone, as DateTimeField does
+            message['sent_at'] = timezone.localtime(message['sent_at'])
+        
+        return paginator.get_paginated_response(page)
     
     @action(detail=True, methods=['post'])
     def add_participant(self, request, conversation_id=None):
         """
-        Add a new participant to an existing conversation
+        Add new participants to an existing conversation
+        Accepts a single 'user_id' or a list of 'user_ids'
         """
         conversation = self.get_object()
         
         user_id = request.data.get('user_id')
-        if not user_id:
+        user_ids = request.data.get('user_ids') or ([user_id] if user_id else [])
+        if not user_ids:
             return Response(
                 {'error': 'User ID is required'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if not isinstance(user_ids, list):
+            return Response(
+                {'error': 'user_ids must be a list of user IDs'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         try:
-            user_to_add = User.objects.get(user_id=user_id)
-            conversation.participants.add(user_to_add)
-            
+            user_ids = {uuid.UUID(str(value)) for value in user_ids}
+        except ValueError:
             return Response(
-                {'message': f'User {user_to_add.username} added to conversation'}, 
-                status=status.HTTP_200_OK
+                {'error': 'Invalid user ID'}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
-        except User.DoesNotExist:
+        
+        # Only the usernames are needed, users are added by id
+        usernames = dict(
+            User.objects.filter(user_id__in=user_ids).order_by('username').values_list('user_id', 'username')
+        )
+        if len(usernames) != len(user_ids):
             return Response(
                 {'error': 'User not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        # One INSERT for all the new rows, m2m_changed keeps the count and cache version up to date
+        conversation.participants.add(*usernames)
+        
+        if len(usernames) == 1:
+            message = f'User {next(iter(usernames.values()))} added to conversation'
+        else:
+            message = f'Users {", ".join(usernames.values())} added to conversation'
+        return Response({'message': message}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['delete'])
     def remove_participant(self, request, conversation_id=None):
@@ -136,16 +276,18 @@ class ConversationViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            user_to_remove = User.objects.get(user_id=user_id)
+            # Only the username is needed, the user is removed by id
+            user_to_remove = User.objects.only('user_id', 'username').get(user_id=user_id)
             
             # Prevent removing yourself if it would leave conversation empty
-            if user_to_remove == request.user and conversation.participants.count() == 1:
+            if user_to_remove.user_id == request.user.user_id and conversation.participants_count == 1:
                 return Response(
                     {'error': 'Cannot remove yourself from conversation as the only participant'}, 
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            conversation.participants.remove(user_to_remove)
+            # m2m_changed recounts the participants and rolls the cache version
+            conversation.participants.remove(user_to_remove.user_id)
             
             return Response(
                 {'message': f'User {user_to_remove.username} removed from conversation'}, 
@@ -156,6 +298,12 @@ class ConversationViewSet(viewsets.ModelViewSet):
                 {'error': 'User not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+    
+    def perform_destroy(self, instance):
+        conversation_id = instance.pk
+        instance.delete()
+        # Cached details of the deleted conversation must not be served again
+        bump_conversation_versions([conversation_id])
 
 
 class MessageViewSet(viewsets.ModelViewSet):
@@ -163,9 +311,16 @@ class MessageViewSet(viewsets.ModelViewSet):
     ViewSet for managing messages - Communication content management
     Handles message creation, retrieval, and management within conversations
     """
-    queryset = Message.objects.all()
+    queryset = Message.objects.none()
     serializer_class = MessageSerializer
+    # Serializers of the actions that do not use serializer_class
+    action_serializer_classes = {
+        'create': MessageCreateSerializer,
+    }
     permission_classes = [IsAuthenticated, IsParticipantOfConversation]
+    # Modifying a message also requires being its sender
+    sender_only_actions = frozenset({'update', 'partial_update', 'destroy'})
+    sender_permission_classes = permission_classes + [IsMessageSender]
     pagination_class = MessagePagination
     lookup_field = 'message_id'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -179,30 +334,67 @@ class MessageViewSet(viewsets.ModelViewSet):
         Filter messages to show only those from conversations where user participates
         """
         user = self.request.user
-        return Message.objects.filter(
-            conversation__participants=user
-        ).select_related('sender', 'conversation')
+        # Semi-join on the participants table instead of joining it
+        membership = Conversation.participants.through.objects.filter(
+            conversation_id=OuterRef('conversation_id'),
+            user_id=user.pk
+        )
+        queryset = Message.objects.filter(
+            Exists(membership)
+        ).select_related('sender').only(
+            # Only the columns rendered by MessageSerializer
+            'message_id', 'message_body', 'sent_at', 'conversation',
+            'sender__user_id', 'sender__username',
+        ).annotate(message_length_db=Length('message_body'))
+        
+        # Object permissions check the conversation's participants on detail routes
+        if self.detail:
+            queryset = queryset.select_related('conversation').prefetch_related(
+                'conversation__participants'
+            )
+        
+        return queryset
     
     def get_serializer_class(self):
         """
         Return appropriate serializer based on action
         """
-        if self.action == 'create':
-            return MessageCreateSerializer
-        return MessageSerializer
+        return self.action_serializer_classes.get(self.action, self.serializer_class)
+    
+    def get_serializer_context(self):
+        """
+        Share one 'recent' cutoff between all the serialized messages
+        """
+        context = super().get_serializer_context()
+        get_recent_cutoff(context)
+        return context
     
     def get_permissions(self):
         """
         Instantiate and return the list of permissions required for this view.
         For update/delete operations, also check if user is the message sender
         """
-        permission_classes = [IsAuthenticated, IsParticipantOfConversation]
-        
-        if self.action in ['update', 'partial_update', 'destroy']:
-            permission_classes.append(IsMessageSender)
+        if self.action in self.sender_only_actions:
+            permission_classes = self.sender_permission_classes
+        else:
+            permission_classes = self.permission_classes
         
         return [permission() for permission in permission_classes]
     
+    def list(self, request, *args, **kwargs):
+        """
+        List messages with the lightweight read-only serializer
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = MessageListSerializer(page, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = MessageListSerializer(queryset, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+    
     def create(self, request, *args, **kwargs):
         """
         Create a new message in a conversation
@@ -212,55 +404,71 @@ class MessageViewSet(viewsets.ModelViewSet):
         
         validated_data = serializer.validated_data
         
-        try:
-            # Get conversation and verify user is participant
-            conversation = Conversation.objects.get(
-                conversation_id=validated_data['conversation_id']
-            )
-            
-            # Check if user is participant (redundant but explicit)
-            if not conversation.participants.filter(user_id=request.user.user_id).exists():
-                return Response(
-                    {'error': 'You are not a participant in this conversation'}, 
-                    status=status.HTTP_403_FORBIDDEN
-                )
-            
-            # Create the message with current user as sender
-            message = Message.objects.create(
-                conversation=conversation,
-                sender=request.user,
-                message_body=validated_data['message_body']
-            )
-            
-            # Serialize response
-            response_serializer = MessageSerializer(message)
-            
-            return Response(
-                response_serializer.data, 
-                status=status.HTTP_201_CREATED
-            )
-            
-        except Conversation.DoesNotExist:
-            return Response(
-                {'error': 'Conversation not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # Verify that the user is a participant with a single probe of the
+        # participants table, the conversation itself is never loaded
+        conversation_id = validated_data['conversation_id']
+        if not Conversation.participants.through.objects.filter(
+            conversation_id=conversation_id,
+            user_id=request.user.user_id
+        ).exists():
+            raise Http404("No Conversation matches the given query.")
+        
+        # Create the message with current user as sender
+        message = Message.objects.create(
+            conversation_id=conversation_id,
+            sender=request.user,
+            message_body=validated_data['message_body']
+        )
+        bump_recent_messages_version(request.user.user_id)
+        
+        # Serialize response
+        response_serializer = MessageSerializer(message, context=self.get_serializer_context())
+        
+        return Response(
+            response_serializer.data, 
+            status=status.HTTP_201_CREATED
+        )
     
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """
         Custom action to get recent messages (last 24 hours)
         """
-        from django.utils import timezone
-        from datetime import timedelta
+        # The feed is cached per user for a few seconds, and dropped
+        # as soon as the user writes a message
+        cache_key = recent_messages_cache_key(request.user.user_id)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
         
         # Get messages from last 24 hours
         recent_time = timezone.now() - timedelta(hours=24)
-        recent_messages = self.get_queryset().filter(sent_at__gte=recent_time)
+        recent_messages = self.get_queryset().filter(
+            sent_at__gte=recent_time
+        ).order_by('-sent_at')[:100]
         
-        serializer = self.get_serializer(recent_messages, many=True)
+        # Stream rows from the cursor instead of caching the whole result set
+        serializer = MessageListSerializer(
+            recent_messages.iterator(chunk_size=500),
+            many=True,
+            context=self.get_serializer_context()
+        )
+        cache.set(cache_key, serializer.data, RECENT_MESSAGES_BUCKET + 5)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        Custom action to walk the whole message history with cursor links
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        
+        paginator = KeysetMessagePagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = MessageListSerializer(page, many=True, context=self.get_serializer_context())
+        
+        return paginator.get_paginated_response(serializer.data)
+    
     @action(detail=True, methods=['patch'])
     def mark_as_read(self, request, message_id=None):
         """
@@ -280,4 +488,20 @@ class MessageViewSet(viewsets.ModelViewSet):
         Override delete to only allow message sender to delete their own messages
         Permission is enforced by IsMessageSender in get_permissions()
         """
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        return super().destroy(request, *args, **kwargs)
+    
+    def perform_update(self, serializer):
+        message = serializer.save()
+        # The annotated length was computed from the body before the update
+        vars(message).pop('message_length_db', None)
+        bump_recent_messages_version(self.request.user.user_id)
+    
+    def perform_destroy(self, instance):
+        # Done here rather than in a post_delete receiver, which would
+        # stop Django from fast-deleting messages
+        conversation_id = instance.conversation_id
+        instance.delete()
+        # The deleted message may have been the latest one
+        refresh_last_message_at([conversation_id])
+        bump_conversation_versions([conversation_id])
+        bump_recent_messages_version(self.request.user.user_id)
\ No newline at end of file
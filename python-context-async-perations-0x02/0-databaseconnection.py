@@ -1,12 +1,34 @@
+import logging
 import sqlite3
+import threading
 from datetime import datetime
 
+# Connection events are logged at DEBUG level, silent unless asked for
+log = logging.getLogger(__name__)
+
+# Connections kept open per thread and per database, reused by every 'with'
+_local = threading.local()
+
+
+def _thread_connections():
+    """
+    Return the reusable connections of the current thread, by database name
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    return connections
+
+
 class DatabaseConnection:
     """
     Custom class-based context manager for database connections.
 
     This class is like a smart doorkeeper that automatically opens the database door
     when you enter and closes it when you leave, no matter what happens inside.
+
+    The door is only opened once per thread: later visits reuse the same
+    connection, which stays open until close_all() is called.
     """
 
     def __init__(self, db_name='user.db'):
@@ -25,36 +47,58 @@ class DatabaseConnection:
         This is like unlocking the door to the database.
         """
 
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] Opening database connection to {self.db_name}")
+        log.debug("Opening database connection to %s", self.db_name)
+
+        connections = _thread_connections()
+        self.connection = connections.get(self.db_name)
+        if self.connection is not None:
+            log.debug("Reusing the open database connection")
+            return self.connection
 
         try:
-            self.connection = sqlite3.connect(self.db_name)
-            print(f"[{timestamp}] Database connection established successfully")
+            # Autocommit, and WAL with relaxed syncs for cheaper writes
+            self.connection = sqlite3.connect(self.db_name, isolation_level=None, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            connections[self.db_name] = self.connection
+            log.debug("Database connection established successfully")
 
             return self.connection
         except Exception as e:
-            print(f"[{timestamp}] Failed to open database connection: {e}")
+            log.error("Failed to open database connection: %s", e)
             raise
 
     def __exit__(self, exc_type, exc_value, traceback):
         """
-        Close the database connection when exiting the context.
-        This is like locking the door to the database.
+        Leave the database connection open for the next context.
+        This is like leaving the door unlocked for the next visit.
         """
 
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        if self.connection:
-            try:
-                self.connection.close()
-                print(f"[{timestamp}] Database connection closed successfully")
-            except Exception as e:
-                print(f"[{timestamp}] Failed to close database connection: {e}")
-        else:
-            print(f"[{timestamp}] No database connection to close")
+        if self.connection is None:
+            log.debug("No database connection to release")
+        elif self.connection.in_transaction:
+            # Never hand a half-finished transaction to the next context
+            self.connection.rollback()
+            log.debug("Open transaction rolled back")
         
         return False
 
+    @staticmethod
+    def close_all():
+        """
+        Close the connections opened by the current thread.
+        This is like locking all the doors when leaving the building.
+        """
+
+        connections = _thread_connections()
+        for db_name, connection in list(connections.items()):
+            try:
+                connection.close()
+                log.debug("Database connection to %s closed successfully", db_name)
+            except Exception as e:
+                log.error("Failed to close database connection: %s", e)
+        connections.clear()
+
     def main():
         """
         Main function to demonstrate the context manager
@@ -83,7 +127,8 @@ class DatabaseConnection:
                 for user in results:
                     print(f"  User ID: {user[0]}, Name: {user[1]}, Age: {user[2]}, Email: {user[3]}")
                     
-            print(f"[{timestamp}] Exited the context - connection automatically closed")
+            print(f"[{timestamp}] Exited the context - connection kept for reuse")
+            DatabaseConnection.close_all()
             
         except Exception as e:
             print(f"[{timestamp}] An error occurred: {e}")
\ No newline at end of file
@@ -1,6 +1,32 @@
+import logging
 import sqlite3
+import threading
 from datetime import datetime
 
+# Query events are logged at DEBUG level, silent unless asked for
+log = logging.getLogger(__name__)
+
+# Connections kept open per thread and per database, so that sqlite's
+# prepared statement cache survives from one query to the next
+_local = threading.local()
+
+
+def _get_connection(db_name):
+    """
+    Return the open connection of the current thread to db_name, opening it once
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    
+    connection = connections.get(db_name)
+    if connection is None:
+        connection = sqlite3.connect(db_name)
+        # 64 MiB page cache, kept warm along with the connection
+        connection.execute('PRAGMA cache_size=-65536')
+        connections[db_name] = connection
+    return connection
+
 class ExecuteQuery:
     """
     Reusable context manager that executes queries with automatic connection handling
@@ -10,6 +36,9 @@ class ExecuteQuery:
     
     """
     
+    # Rows fetched from sqlite per batch
+    arraysize = 1000
+    
     def __init__(self, query, parameters=None, db_name='users.db'):
         """
         Initialize the query context manager
@@ -34,18 +63,16 @@ class ExecuteQuery:
         
         Our assistant opens the door, asks the question, and gets ready to give you the answer
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] Opening database connection and preparing query...")
+        log.debug("Opening database connection and preparing query...")
         
         try:
-            # Open database connection
+            # Open database connection, or reuse the one already open
             # Open the magic door to the database
-            self.connection = sqlite3.connect(self.db_name)
+            self.connection = _get_connection(self.db_name)
             self.cursor = self.connection.cursor()
+            self.cursor.arraysize = self.arraysize
             
-            print(f"[{timestamp}] Executing query: {self.query}")
-            if self.parameters:
-                print(f"[{timestamp}] With parameters: {self.parameters}")
+            log.debug("Executing query: %s with parameters: %s", self.query, self.parameters)
             
             # Execute the query
             # Ask the database the question
@@ -54,53 +81,72 @@ class ExecuteQuery:
             else:
                 self.cursor.execute(self.query)
             
-            # Fetch the results
-            # Get the answer from the database
-            self.results = self.cursor.fetchall()
-            
-            print(f"[{timestamp}] Query executed successfully! Found {len(self.results)} results")
+            log.debug("Query executed successfully!")
             
             # Return the results so they can be used
-            # Hand you the answer
+            # Hand you the answer, one batch of rows at a time
+            self.results = self._iter_rows()
             return self.results
             
         except Exception as e:
-            print(f"[{timestamp}] Error executing query: {e}")
+            log.error("Error executing query: %s", e)
             # Clean up if something went wrong
-            if self.connection:
-                self.connection.close()
+            if self.cursor:
+                self.cursor.close()
             raise
     
+    def _iter_rows(self):
+        """
+        Yield the rows of the query, fetched in batches of cursor.arraysize
+        
+        Only one batch is held in memory, whatever the size of the result
+        """
+        while True:
+            rows = self.cursor.fetchmany()
+            if not rows:
+                return
+            yield from rows
+    
     def __exit__(self, exc_type, exc_value, traceback):
         """
-        Exit the context - close connection and clean up
+        Exit the context - close the cursor and clean up
         
-        Our assistant cleans up everything and locks the door, 
-        no matter what happened
+        Our assistant cleans up everything, no matter what happened,
+        and leaves the door ready for the next question
         
         peu importe ce qui s'est passé
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Close cursor and connection
-        # Put away all the tools and lock the door
+        # Close the cursor, the connection stays open for the next query
+        # Put away all the tools
         if self.cursor:
             self.cursor.close()
-            
-        if self.connection:
-            try:
-                self.connection.close()
-                print(f"[{timestamp}] Database connection closed successfully")
-            except Exception as e:
-                print(f"[{timestamp}] Error closing database connection: {e}")
+        
+        if self.connection is not None and self.connection.in_transaction:
+            self.connection.rollback()
         
         # Handle any exceptions
         # Report any problems that happened
         if exc_type is not None:
-            print(f"[{timestamp}] Exception occurred: {exc_type.__name__}: {exc_value}")
+            log.debug("Exception occurred: %s: %s", exc_type.__name__, exc_value)
             return False
         
         return True
+    
+    @staticmethod
+    def close_all():
+        """
+        Close the connections opened by the current thread
+        
+        Lock all the doors when there are no more questions to ask
+        """
+        connections = getattr(_local, 'connections', {})
+        for connection in connections.values():
+            try:
+                connection.close()
+                log.debug("Database connection closed successfully")
+            except Exception as e:
+                log.error("Error closing database connection: %s", e)
+        connections.clear()
 
 def main():
     """
@@ -126,9 +172,11 @@ def main():
     print(f"\n[{timestamp}] === Example 2: All users ===")
     try:
         with ExecuteQuery("SELECT * FROM users") as results:
-            print(f"[{timestamp}] Found {len(results)} total users:")
+            total = 0
             for user in results:
                 print(f"  {user[1]} (Age: {user[2]})")
+                total += 1
+            print(f"[{timestamp}] Found {total} total users")
                 
     except Exception as e:
         print(f"[{timestamp}] Error in example 2: {e}")
@@ -145,6 +193,9 @@ def main():
                 
     except Exception as e:
         print(f"[{timestamp}] Error in task specific query: {e}")
+    
+    # The three examples shared one connection, close it now
+    ExecuteQuery.close_all()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,119 +1,109 @@
 import asyncio
+import logging
 import aiosqlite
 from datetime import datetime
 
-async def async_fetch_users():
+# Fetcher events are logged at DEBUG level, silent unless asked for
+log = logging.getLogger(__name__)
+
+# Age above which a user counts as older, picked out by async_fetch_all
+OLDER_USER_AGE = 40
+
+# Rows pulled from the worker thread per hop when streaming a cursor
+FETCH_BATCH_SIZE = 500
+
+async def async_fetch_users(db):
     """
-    Asynchronously fetch all users from the database
+    Asynchronously stream all users from the database, one row at a time
+
+    Args:
+        db: Shared aiosqlite connection opened by async_main
+
+    Yields:
+        tuple: (id, name, age, email) for each user
     
-    This is like a chef who can start preparing ingredients 
-    while other dishes are cooking - no waiting around!
+    This is like a chef who serves each plate as soon as it is ready,
+    instead of waiting for the whole table's order to be cooked!
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] Starting async_fetch_users...")
+    log.debug("Starting async_fetch_users...")
+    count = 0
     
     try:
-        # Open async database connection
-        # Open a magic door that doesn't block other doors from opening
-        async with aiosqlite.connect('users.db') as db:
-            print(f"[{timestamp}] async_fetch_users: Database connected")
-            
-            # Execute the query asynchronously
-            # Ask a question without stopping other conversations
-            cursor = await db.execute("SELECT * FROM users")
-            users = await cursor.fetchall()
-            
-            print(f"[{timestamp}] async_fetch_users: Found {len(users)} users")
-            
-            # Simulate some processing time
-            # Pretend we're doing some work (like seasoning a dish)
-            await asyncio.sleep(1)
-            
-            print(f"[{timestamp}] async_fetch_users: Completed")
-            return users
+        # Execute the query asynchronously on the shared connection
+        # Ask a question through the shared magic door
+        async with db.execute("SELECT id, name, age, email FROM users") as cursor:
+            # Rows come over in chunks of FETCH_BATCH_SIZE, never the whole table at once
+            async for user in cursor:
+                count += 1
+                yield user
+        
+        log.debug("async_fetch_users: Found %s users", count)
+        
+        log.debug("async_fetch_users: Completed")
             
     except Exception as e:
-        print(f"[{timestamp}] Error in async_fetch_users: {e}")
+        log.error("Error in async_fetch_users: %s", e)
         raise
 
-async def async_fetch_older_users():
+async def async_fetch_all(db):
     """
-    Asynchronously fetch users older than 40 from the database
-    
-    This is like another chef working on a different dish
-    at the same time as the first chef!    
+    Show all users and pick out the older ones with a single scan of the table
+
+    Each user is printed as soon as its row arrives, so the table is never
+    held in memory; only the older users, a subset, are kept for later.
+
+    Args:
+        db: Shared aiosqlite connection opened by async_main
+
+    Returns:
+        tuple: (user_count, older_users)
     """
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] Starting async_fetch_older_users...")
-    
-    try:
-        # Open async database connection
-        # Open another magic door that works independently
-        async with aiosqlite.connect('users.db') as db:
-            print(f"[{timestamp}] async_fetch_older_users: Database connected")
-            
-            # Execute the query asynchronously
-            # Ask a different question at the same time
-            cursor = await db.execute("SELECT * FROM users WHERE age > ?", (40,))
-            older_users = await cursor.fetchall()
-            
-            print(f"[{timestamp}] async_fetch_older_users: Found {len(older_users)} users older than 40")
-            
-            # Simulate some processing time
-            # Pretend we're doing different work (like chopping vegetables)
-            await asyncio.sleep(1.5)
-            
-            print(f"[{timestamp}] async_fetch_older_users: Completed")
-            return older_users
-            
-    except Exception as e:
-        print(f"[{timestamp}] Error in async_fetch_older_users: {e}")
-        raise
+    user_count = 0
+    older_users = []
+    # Show everything the chef cooked, plate by plate
+    print(f"\n[{timestamp}] === ALL USERS (from async_fetch_users) ===")
+    async for user in async_fetch_users(db):
+        user_count += 1
+        print(f"  ID: {user[0]}, Name: {user[1]}, Age: {user[2]}, Email: {user[3]}")
+        if user[2] is not None and user[2] > OLDER_USER_AGE:
+            older_users.append(user)
+    return user_count, older_users
 
-async def fetch_concurrently():
+async def fetch_concurrently(db):
     """
-    Execute both queries concurrently using asyncio.gather
+    Fetch all users and older users in a single pass, then show both results
     
-    This is like having two chefs work on different dishes
-    at the same time, and then serving both dishes together!    
+    This is like one chef cooking the whole table's order at once,
+    setting aside the plates for the older guests along the way!
     """
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] Starting concurrent fetch operations...")
+    print(f"[{timestamp}] Starting single-pass fetch...")
     
     try:
-        # Execute both functions concurrently
-        # Start both chefs cooking at the same time
+        # Time the whole meal
         start_time = asyncio.get_event_loop().time()
         
-        # Use asyncio.gather to run both queries concurrently
-        # Tell both chefs to start cooking and wait for both to finish
-        all_users, older_users = await asyncio.gather(
-            async_fetch_users(),
-            async_fetch_older_users()
-        )
+        # One query on the shared connection serves both listings
+        # One chef, one trip to the stove
+        user_count, older_users = await async_fetch_all(db)
         
         end_time = asyncio.get_event_loop().time()
         total_time = end_time - start_time
         
-        print(f"\n[{timestamp}] ===== CONCURRENT RESULTS =====")
-        print(f"[{timestamp}] Total execution time: {total_time:.2f} seconds")
-        print(f"[{timestamp}] Both queries completed concurrently!")
-        
-        # Display results from first query
-        # Show what the first chef cooked
-        print(f"\n[{timestamp}] === ALL USERS (from async_fetch_users) ===")
-        for user in all_users:
-            print(f"  ID: {user[0]}, Name: {user[1]}, Age: {user[2]}, Email: {user[3]}")
-        
-        # Display results from second query
-        # Show what the second chef cooked
-        print(f"\n[{timestamp}] === USERS OLDER THAN 40 (from async_fetch_older_users) ===")
+        # Display the older users picked out of the same rows
+        # Show the plates set aside for the older guests
+        print(f"\n[{timestamp}] === USERS OLDER THAN {OLDER_USER_AGE} (from async_fetch_all) ===")
         for user in older_users:
             print(f"  ID: {user[0]}, Name: {user[1]}, Age: {user[2]}, Email: {user[3]}")
         
-        print(f"\n[{timestamp}] Concurrent execution completed successfully!")
+        print(f"\n[{timestamp}] ===== SINGLE-PASS RESULTS =====")
+        print(f"[{timestamp}] Total execution time: {total_time:.2f} seconds")
+        print(f"[{timestamp}] Single query completed! {user_count} users, {len(older_users)} older")
+        
+        print(f"\n[{timestamp}] Single-pass fetch completed successfully!")
         
-        return all_users, older_users
+        return user_count, older_users
         
     except Exception as e:
         print(f"[{timestamp}] Error in fetch_concurrently: {e}")
@@ -121,29 +111,45 @@ async def fetch_concurrently():
 
 def main():
     """
-    Main function to run the concurrent async operations
+    Main function to run the async fetch
     """
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] Starting Concurrent Asynchronous Database Operations Demo")
+    print(f"[{timestamp}] Starting Asynchronous Database Operations Demo")
     print(f"[{timestamp}] " + "="*60)
     
     # Run the async operations
-    # Start our kitchen with two chefs working together!
+    # Open the kitchen!
     asyncio.run(async_main())
 
 async def async_main():
     """
     Async main function to coordinate all operations
     """
+    db = None
     try:
+        # Open one async connection for the whole fetch
+        # One magic door for the whole kitchen
+        # Cursors iterated with async for fetch FETCH_BATCH_SIZE rows per hop
+        db = await aiosqlite.connect('users.db', iter_chunk_size=FETCH_BATCH_SIZE)
+        await db.execute('PRAGMA journal_mode=WAL')  # Les lecteurs ne bloquent pas
+        await db.execute('PRAGMA synchronous=NORMAL')
+        await db.execute('PRAGMA temp_store=memory')
+        await db.execute('PRAGMA cache_size=-64000')  # ~64 MB de cache de pages
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] Shared database connection opened")
         
-        # Run concurrent operations
-        # Now let both chefs start cooking!
-        await fetch_concurrently()
+        # Run the single-pass fetch
+        # Now let the chef start cooking!
+        await fetch_concurrently(db)
         
     except Exception as e:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] Error in main execution: {e}")
+    finally:
+        # Close the door once the chef is done
+        if db is not None:
+            await db.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
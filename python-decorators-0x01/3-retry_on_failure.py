@@ -1,101 +1,100 @@
-import sqlite3
 import functools
-from datetime import datetime
+import logging
+import time
 
-def with_db_connection(func):
-    """
-    Decorator that automatically handles database connections
-    
-    This decorator is like a helpful doorman that opens and closes
-    the database door for you automatically.
-    """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Log the connection attempt with timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] Opening database connection...")
-
-        # Open the database connection
-        # Open the magic door to talk to the database
-        conn = sqlite3.connect('users.db')
+from db_connection import with_db_connection
 
-        try:
-            # Call the original function with the connection
-            # Do the work with the open door
-            result = func(conn, *args, **kwargs)
+# Decorator events are logged at DEBUG level, silent unless asked for
+log = logging.getLogger(__name__)
 
-            print(f"[{timestamp}] Database operation completed successfully")
-            return result
-
-        except Exception as e:
-            print(f"[{timestamp}] Error during database operation: {e}")
-            raise
-
-        finally:
-            conn.close()
-            print(f"[{timestamp}] Closing database connection...")
-
-    return wrapper
+def _is_transactional(func):
+    """
+    Tell whether func, or a function it wraps, runs inside transactional
+    (see 2-transactional.py, whose wrapper sets is_transactional)
+    """
+    while func is not None:
+        if getattr(func, 'is_transactional', False):
+            return True
+        func = getattr(func, '__wrapped__', None)
+    return False
 
-def retry_on_failure(retries=3, delay=2):
+def retry_on_failure(retries=3, delay=2, idempotent=False):
     """
     Decorator that retries database operations on failure
     
     This decorator is like a determined child who keeps asking
     "Can we try again?" until they get what they want or run out of chances.
+    But it only asks again when asking twice can't break anything:
+    reads are safe, writes must be rolled back by transactional first.
     
     Args:
         retries (int): Number of retry attempsts (default: 3)
-        delay (int): Delay in seconds between retries (default : 2)
+        delay (int): Delay in seconds before the first retry, doubled
+            after each failed attempt (default : 2)
+        idempotent (bool): True when running func twice is harmless,
+            like a read (default: False)
+    
+    Raises:
+        ValueError: If func is neither idempotent nor transactional
     """
-    def decorator(fun):
+    def decorator(func):
+        if not idempotent and not _is_transactional(func):
+            raise ValueError(
+                f"{func.__name__} is not idempotent: wrap it with transactional "
+                f"so a failed attempt is rolled back before retrying"
+            )
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
             # Try the function multiple times
             # Keep trying like a persistent child
             
             for attempt in range(retries +1):
                 try:
-                    if attempt > 0
-                        print(f"[{timestamp}] Retry attempt {attempt}/{retries}")
+                    if attempt > 0:
+                        log.debug("Retry attempt %s/%s", attempt, retries)
                         
                     result = func(*args, **kwargs)
                     
                     if attempt > 0:
-                        print(f"[{timestamp}] Operation succeeded on retry {attempt}")
+                        log.debug("Operation succeeded on retry %s", attempt)
                         
                     return result
                 
                 except Exception as e:
-                    print(f"[{timestamp}] Attempt {attempt + 1} failed: {e}")
+                    log.warning("Attempt %s failed: %s", attempt + 1, e)
                     
                     # If this was our last attempt, give up
                     # If we've tried all our chances, it's time to give up
                     
                     if attempt == retries:
-                        print(f"[{timestamp}] All {retries + 1} attempts failed. Giving up.")
+                        log.warning("All %s attempts failed. Giving up.", retries + 1)
                         raise
                     
-                    # Wait before trying again
-                    # Take a little break before trying again
-                    print(f"[{timestamp}] Waiting {delay} seconds before retry...")
-                    time.sleep(delay)
+                    # Wait before trying again, a little longer each time
+                    # Take a longer break after each failure, so we don't all knock at once
+                    backoff = delay * (2 ** attempt)
+                    log.debug("Waiting %s seconds before retry...", backoff)
+                    time.sleep(backoff)
                     
         return wrapper
     
     return decorator
 
 @with_db_connection
-@retry_on_failure(retries=3, delay=1)
+@retry_on_failure(retries=3, delay=1, idempotent=True)
 
 def fetch_users_with_retry(conn):
-cursor = conn.cursor()
-cursor.execute("SELECT * FROM users")
-return cursor.fetchall()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+
+if __name__ == "__main__":
+    # INFO and above only: the DEBUG events of the decorators stay silent
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 
-#### attempt to fetch users with automatic retry on failure
+    #### attempt to fetch users with automatic retry on failure
 
-users = fetch_users_with_retry()
-print(users)
\ No newline at end of file
+    users = fetch_users_with_retry()
+    print(users)
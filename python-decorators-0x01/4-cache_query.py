@@ -1,37 +1,15 @@
-import sqlite3 
 import functools
-from datetime import datetime
+import logging
 
-def with_db_connection(func):
-    """
-    Decorator that automatically handles database connections
-    """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] Opening database connection...")
-        
-        conn = sqlite3.connect('users.db')
-        
-        try:
-            result = func(conn, *args, **kwargs)
-            print(f"[{timestamp}] Database operation completed successfully")
-            return result
-            
-        except Exception as e:
-            print(f"[{timestamp}] Error during database operation: {e}")
-            raise
-            
-        finally:
-            conn.close()
-            print(f"[{timestamp}] Database connection closed")
-    
-    return wrapper
+from db_connection import with_db_connection
+
+# Decorator events are logged at DEBUG level, silent unless asked for
+log = logging.getLogger(__name__)
 
-# Global cache dictionary - our memory notebook
-# English: This is our magic notebook that remembers everything
-# Français: C'est notre carnet magique qui se souvient de tout
-query_cache = {}
+# Size of the query cache - how many answers our notebook can hold
+# English: Our magic notebook only has so many pages, the oldest answers get erased
+# Français: Notre carnet magique a un nombre limité de pages, les plus vieilles réponses sont effacées
+QUERY_CACHE_SIZE = 256
 
 def cache_query(func):
     """
@@ -43,68 +21,74 @@ def cache_query(func):
     Français: Ce décorateur est comme avoir une super mémoire qui n'oublie jamais.
     Il se souvient de chaque question et réponse pour que tu n'aies pas à demander deux fois !
     """
+    # The results live in a bounded LRU cache keyed by (conn, query, params)
+    # English: One lookup in the notebook, and the same question through another door is another page
+    # Français: Une seule recherche, et la même question par une autre porte est une autre page
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def _cached(conn, query, params_key, named):
+        # The answer comes from the connection the caller passed in
+        if named:
+            # Named params were keyed as sorted (name, value) pairs
+            return func(conn, query, dict(params_key))
+        if params_key:
+            return func(conn, query, params_key)
+        return func(conn, query)
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Create a cache key from the query
-        # English: Make a unique name for this question so we can find it later
-        # Français: Créer un nom unique pour cette question pour qu'on puisse la retrouver plus tard
-        
-        # Get the query from arguments
-        query = None
-        if 'query' in kwargs:
-            query = kwargs['query']
-        elif args:
-            # Assuming query is the first argument after conn
-            query = args[0] if len(args) > 0 else None
+        # Get the query and its parameters from arguments
+        # English: Find the question and its details so we can look them up later
+        # Français: Trouver la question et ses détails pour qu'on puisse les retrouver plus tard
+        query = kwargs.get('query', args[0] if args else None)
+        params = kwargs.get('params', args[1] if len(args) > 1 else ())
         
         if query is None:
             # If we can't find a query, just execute without caching
-            print(f"[{timestamp}] No query found for caching, executing directly")
+            log.debug("No query found for caching, executing directly")
             return func(conn, *args, **kwargs)
         
-        # Use the query as the cache key
-        cache_key = query.strip().lower()  # Normalize the query
-        
-        # Check if we already have this answer in our notebook
-        # English: Look in our memory notebook to see if we already know the answer
-        # Français: Regarder dans notre carnet de mémoire pour voir si on connaît déjà la réponse
-        if cache_key in query_cache:
-            print(f"[{timestamp}] Cache HIT! Returning cached result for query: {query}")
-            print(f"[{timestamp}] Cached at: {query_cache[cache_key]['timestamp']}")
-            return query_cache[cache_key]['result']
-        
-        # If we don't have the answer, do the work and remember it
-        # English: If we don't know the answer, do the hard work and write it down
-        # Français: Si on ne connaît pas la réponse, faire le travail difficile et l'écrire
-        print(f"[{timestamp}] Cache MISS! Executing query: {query}")
-        result = func(conn, *args, **kwargs)
-        
-        # Store the result in our cache notebook
-        # English: Write down the question and answer in our memory notebook
-        # Français: Écrire la question et la réponse dans notre carnet de mémoire
-        query_cache[cache_key] = {
-            'result': result,
-            'timestamp': timestamp,
-            'query': query
-        }
+        # Named params are keyed by their items, so different values never share a page
+        named = isinstance(params, dict)
+        params_key = tuple(sorted(params.items())) if named else tuple(params or ())
+
+        try:
+            hash(params_key)
+        except TypeError:
+            # A value that cannot be a notebook key, ask the database directly
+            log.debug("Unhashable params, executing without caching")
+            return func(conn, *args, **kwargs)
+
+        # Look in our memory notebook, or do the hard work and write it down
+        misses = _cached.cache_info().misses
+        result = _cached(conn, query, params_key, named)
         
-        print(f"[{timestamp}] Result cached for future use")
+        if _cached.cache_info().misses == misses:
+            log.debug("Cache HIT! Returning cached result for query: %s", query)
+        else:
+            log.debug("Cache MISS! Result cached for query: %s", query)
         return result
     
+    # Let callers forget everything, e.g. after a write
+    wrapper.cache_clear = _cached.cache_clear
+    wrapper.cache_info = _cached.cache_info
     return wrapper
 
-
 @with_db_connection
 @cache_query
-def fetch_users_with_cache(conn, query):
-    cursor = conn.cursor()
-    cursor.execute(query)
-    return cursor.fetchall()
+def fetch_users_with_cache(conn, query, params=()):
+    # On a miss with new params, the shared connection's statement cache
+    # already holds this query prepared, so only the bind and step run again
+    return conn.execute(query, params).fetchall()
+
+
+if __name__ == "__main__":
+    # INFO and above only: the DEBUG events of the decorators stay silent
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+    #### First call will cache the result
+    users = fetch_users_with_cache(query="SELECT * FROM users")
 
-#### First call will cache the result
-users = fetch_users_with_cache(query="SELECT * FROM users")
+    #### Second call will use the cached result
+    users_again = fetch_users_with_cache(query="SELECT * FROM users")
 
-#### Second call will use the cached result
-users_again = fetch_users_with_cache(query="SELECT * FROM users")
\ No newline at end of file
+    print(fetch_users_with_cache.cache_info())
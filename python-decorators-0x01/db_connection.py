@@ -0,0 +1,67 @@
+import atexit
+import sqlite3
+import functools
+import logging
+
+# Shared by the decorator exercises (1- to 4-), which import with_db_connection
+# Connection events are logged at DEBUG level, silent unless asked for
+log = logging.getLogger(__name__)
+
+# One connection for the whole process, opened on first use
+# English: Open the database door once and keep it open, so its page cache stays warm
+# Français: Ouvrir la porte de la base une seule fois et la garder ouverte, le cache reste chaud
+DB_NAME = 'users.db'
+_CONN = None
+
+def _apply_pragmas(conn, db_name=DB_NAME):
+    """
+    Switch the database to WAL and tune the shared connection
+    """
+    if db_name == ':memory:':
+        return
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-64000')
+    conn.execute('PRAGMA mmap_size=268435456')
+
+def get_connection():
+    """
+    Return the process-wide connection, opening it the first time
+    """
+    global _CONN
+    if _CONN is None:
+        _CONN = sqlite3.connect(DB_NAME, check_same_thread=False)
+        _apply_pragmas(_CONN)
+        # Close the door when the program ends
+        atexit.register(_CONN.close)
+    return _CONN
+
+def with_db_connection(func):
+    """
+    Decorator that automatically handles database connections
+    
+    This decorator is like a helpful doorman who opens the database
+    door the first time and then keeps it open for everyone after.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        log.debug("Using database connection...")
+
+        # Reuse the shared database connection
+        # Walk through the magic door that is already open
+        conn = get_connection()
+
+        try:
+            # Call the original function with the connection
+            # Do the work with the open door
+            result = func(conn, *args, **kwargs)
+
+            log.debug("Database operation completed successfully")
+            return result
+
+        except Exception as e:
+            log.error("Error during database operation: %s", e)
+            raise
+
+    return wrapper
@@ -1,9 +1,16 @@
+import sys
+
 import mysql.connector
 
-def stream_users_in_batches(batch_size=25):
+# Columns selected from user_data, in the order of the row tuples
+USER_COLUMNS = ('user_id', 'name', 'email', 'age')
+
+
+def stream_users_in_batches(batch_size=1000, min_age=None):
     """
     Fetches rows in batches from the user_data table
-    Uses yield to generate batches of users
+    Uses yield to generate batches of users, as tuples in USER_COLUMNS order
+    When min_age is given, only users older than it are fetched
     """
     conn = None
     cursor = None
@@ -14,8 +21,14 @@ def stream_users_in_batches(batch_size=25):
             password='',
             database='ALX_prodev'
         )
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM user_data")
+        # Unbuffered tuple cursor: rows stay on the server until fetchmany asks for them
+        cursor = conn.cursor(buffered=False)
+        query = f"SELECT {', '.join(USER_COLUMNS)} FROM user_data"
+        if min_age is None:
+            cursor.execute(query)
+        else:
+            # Let MySQL skip the rejected rows instead of sending them over
+            cursor.execute(query + " WHERE age > %s", (min_age,))
 
         while True:
             batch = cursor.fetchmany(batch_size)
@@ -29,23 +42,30 @@ def stream_users_in_batches(batch_size=25):
         yield from []
 
     finally:
+        # An unbuffered cursor left unread (generator closed early) may refuse
+        # to close cleanly, so the connection is closed on its own
         try:
             if cursor:
                 cursor.close()
-            if conn:    
+        except Exception:
+            pass
+        try:
+            if conn:
                 conn.close()
         except Exception:
             pass
 
-def batch_processing(batch_size=25):
+def batch_processing(batch_size=1000):
     """
     Processes each batch to filter users over age 25
     """
     try:
-        for batch in stream_users_in_batches(batch_size):
-            for user in batch:
-                if user['age'] > 25:
-                    print(user)
+        # One write per batch instead of one print per user
+        for batch in stream_users_in_batches(batch_size, min_age=25):
+            sys.stdout.write(''.join(
+                f"{dict(zip(USER_COLUMNS, user))!r}\n" for user in batch
+            ))
+        sys.stdout.flush()
                     
     except Exception as e:
         print(f"Error during batch processing: {e}")
\ No newline at end of file
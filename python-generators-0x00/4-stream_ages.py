@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 import mysql.connector
+seed = __import__('seed')
 
 def stream_user_ages():
     """
@@ -8,12 +9,9 @@ def stream_user_ages():
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='ALX_prodev'
-        )
+        conn = seed.connect_to_prodev()
+        if conn is None:
+            return
         cursor = conn.cursor()
         cursor.execute("SELECT age FROM user_data")
         for (age,) in cursor:
@@ -28,19 +26,32 @@ def stream_user_ages():
 
 def compute_average_age():
     """
-    Compute and print the average age using the stream_user_ages generator.
+    Compute and print the average age in one SQL aggregate.
+    MySQL scans the table and sends back a single row, instead of
+    streaming every age through stream_user_ages.
+    Returns the average, or None when the database could not be read.
     """
-    total = 0
-    count = 0
-    for age in stream_user_ages():
-        total += age
-        count += 1
+    conn = seed.connect_to_prodev()
+    if conn is None:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT AVG(age), COUNT(*) FROM user_data")
+        average, count = cursor.fetchone()
+    except mysql.connector.Error as err:
+        print(f"Database error: {err}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
 
-    if count == 0:
+    if not count:
         print("Average age of users: 0")
-    else:
-        average = total / count
-        print(f"Average age of users: {average:.2f}")
+        return 0
+    print(f"Average age of users: {average:.2f}")
+    return average
 
 if __name__ == "__main__":
     compute_average_age()
@@ -1,12 +1,17 @@
 import mysql.connector
 import csv
 import uuid
+from itertools import islice
+
+# Rows read from the CSV and inserted per statement and transaction,
+# small enough to stay under MySQL's default max_allowed_packet
+INSERT_BATCH_SIZE = 1000
 
 def connect_db():
     try:
         connection = mysql.connector.connect(
             host='localhost',
-            usesr='root',
+            user='root',
             password=''
         )
         return connection
@@ -27,7 +32,7 @@ def connect_to_prodev():
     try:
         connection = mysql.connector.connect(
             host='localhost',
-            user='root'
+            user='root',
             password='',
             database='ALX_prodev'
         )
@@ -44,7 +49,8 @@ def create_table(connection):
             user_id VARCHAR(36) PRIMARY KEY,
             name VARCHAR(255) NOT NULL,
             email VARCHAR(255) NOT NULL,
-            age DECIMAL NOT NULL
+            age DECIMAL NOT NULL,
+            UNIQUE KEY email_unique (email)
         )
         """
         cursor.execute(create_query)
@@ -55,19 +61,37 @@ def create_table(connection):
         print(f"Error creating table: {err}")
 
 def insert_data(connection, csv_file):
+    """
+    Inserts the CSV rows whose email is not already in user_data.
+    Rows go in batches: one lookup of the existing emails, one executemany,
+    which the connector sends as a single multi-row INSERT, and one commit
+    per INSERT_BATCH_SIZE rows.
+    """
+    insert_query = "INSERT INTO user_data (user_id, name, email, age) VALUES (%s, %s, %s, %s)"
     try:
+        connection.autocommit = False
         cursor = connection.cursor()
-        With open(csv_file, newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                cursor.execute("SELECT * FROM user_data WHERE email = %s", (row['email'],))
-                if cursor.fetchone():
-                    continue
-                # Insert new user
-                insert_query = "INSERT INTO user_data (user_id, name, email, age) VALUES (%s, %s, %s, %s)"
-                uid = str(uuid.uuid4())
-                cursor.execute(insert_query, (uid, row['name'], row['email'], row['age']))
-        connection.commit()
+        with open(csv_file, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            while True:
+                chunk = list(islice(reader, INSERT_BATCH_SIZE))
+                if not chunk:
+                    break
+                emails = [row['email'] for row in chunk]
+                placeholders = ', '.join(['%s'] * len(emails))
+                cursor.execute(f"SELECT email FROM user_data WHERE email IN ({placeholders})", emails)
+                seen = {email for (email,) in cursor.fetchall()}
+                rows = []
+                for row in chunk:
+                    # Skip users already there, or repeated within the file
+                    if row['email'] in seen:
+                        continue
+                    seen.add(row['email'])
+                    rows.append((str(uuid.uuid4()), row['name'], row['email'], row['age']))
+                if rows:
+                    cursor.executemany(insert_query, rows)
+                connection.commit()
         cursor.close()
     except Exception as e:
+        connection.rollback()
         print(f"Error inserting data: {e}")